@@ -27,6 +27,7 @@ const int MqttPort = 1883;
 // MQTT topics
 const char* TopicMotorKanan = "MotorKanan";
 const char* TopicMotorKiri = "MotorKiri";
+const char* TopicMotorSpeed = "MotorSpeed";  // Combined "RightSpeed,LeftSpeed"
 
 // Create WiFi and MQTT clients
 WiFiClient WifiClient;
@@ -178,6 +179,18 @@ void MqttCallback(char* Topic, byte* Payload, unsigned int Length) {
       LeftSpeed = constrain(NewLeftSpeed, 0, 255);
       xSemaphoreGive(SpeedMutex);
     }
+  } else if (strcmp(Topic, TopicMotorSpeed) == 0) {
+    int Separator = Message.indexOf(',');
+    if (Separator > 0) {
+      int NewRightSpeed = Message.substring(0, Separator).toInt();
+      int NewLeftSpeed = Message.substring(Separator + 1).toInt();
+      // Update both motors under one lock so they always come from the same command
+      if (xSemaphoreTake(SpeedMutex, portMAX_DELAY)) {
+        RightSpeed = constrain(NewRightSpeed, 0, 255);
+        LeftSpeed = constrain(NewLeftSpeed, 0, 255);
+        xSemaphoreGive(SpeedMutex);
+      }
+    }
   }
 
   // Update timestamp for last MQTT data
@@ -192,6 +205,7 @@ bool ConnectToMqtt() {
       Serial.println("MQTT connected");
       MqttClient.subscribe(TopicMotorKanan);
       MqttClient.subscribe(TopicMotorKiri);
+      MqttClient.subscribe(TopicMotorSpeed);
       return true;
     } else {
       Serial.print("Failed to connect to MQTT, rc=");
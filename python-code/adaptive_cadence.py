@@ -0,0 +1,191 @@
+import math
+
+import cv2
+import numpy as np
+
+from roi_midpoints import calculate_roi_midpoints, roi_row_indices
+
+
+class CorridorTracker:
+    def __init__(self, active_rois, num_rois=10, min_pixels=50, margin=(8, 40, 40)):
+        """
+        Propagate ROI midpoints between segmentation frames with an HSV lookup.
+
+        On every segmented frame the HSV range of the corridor inside each active ROI is
+        learned from the mask. On the frames in between only the active ROI rows are
+        converted to HSV and thresholded with that range, inside a search window around
+        the last corridor, which is far cheaper than running the model.
+
+        Args:
+            active_rois (list of int): ROI indices to track.
+            num_rois (int): Number of horizontal ROI bands in the frame.
+            min_pixels (int): Minimum corridor pixels in an ROI to learn its color range.
+            margin (tuple): HSV margin added around the learned range.
+        """
+        self.active_rois = active_rois
+        self.num_rois = num_rois
+        self.min_pixels = min_pixels
+        self.margin = np.array(margin, dtype=np.int32)
+        self.models = {}          # roi_index -> (lower, upper, midpoint_x, width, expected_pixels)
+        self.reference = {}       # Midpoints of the last segmented frame
+
+    def roi_bands(self, frame):
+        """
+        Return the active ROI rows of the frame converted to HSV, shape (n, roi_height, W, 3).
+        """
+        rows, roi_height = roi_row_indices(frame.shape[0], self.active_rois, self.num_rois)
+        bands = frame[rows.ravel()]
+        hsv = cv2.cvtColor(bands, cv2.COLOR_BGR2HSV)
+        return hsv.reshape(len(self.active_rois), roi_height, frame.shape[1], 3)
+
+    def update(self, frame, binary_mask, midpoints):
+        """
+        Learn the corridor appearance from a segmented frame.
+
+        Args:
+            frame (numpy.ndarray): The input video frame.
+            binary_mask (numpy.ndarray): Single-channel mask of the frame (any resolution).
+            midpoints (dict): Midpoints of the segmented frame in frame coordinates.
+        """
+        height, width = frame.shape[:2]
+        if binary_mask.shape[:2] != (height, width):
+            binary_mask = cv2.resize(binary_mask, (width, height), interpolation=cv2.INTER_NEAREST)
+
+        rows, _ = roi_row_indices(height, self.active_rois, self.num_rois)
+        hsv = self.roi_bands(frame)
+        fg = binary_mask[rows] > 0
+
+        self.models = {}
+        self.reference = dict(midpoints)
+        for i, roi_index in enumerate(self.active_rois):
+            point = midpoints.get(roi_index)
+            pixels = hsv[i][fg[i]]
+            if point is None or len(pixels) < self.min_pixels:
+                continue
+            low, high = np.percentile(pixels, [5, 95], axis=0).astype(np.int32)
+            lower = np.clip(low - self.margin, 0, 255).astype(np.uint8)
+            upper = np.clip(high + self.margin, 0, 255).astype(np.uint8)
+            columns = np.flatnonzero(fg[i].any(axis=0))
+            corridor_width = int(columns[-1] - columns[0] + 1)
+            # Corridor pixels the last mask had in this ROI band; tracked frames are scored against it
+            self.models[roi_index] = (lower, upper, point[0], corridor_width, len(pixels))
+
+    def track(self, frame):
+        """
+        Estimate the midpoints of a frame that was not segmented.
+
+        Returns:
+            tuple: (midpoints, confidence, drift)
+                   - midpoints: Dictionary of midpoints for active ROIs in frame coordinates.
+                   - confidence: Lowest ratio of found vs. expected corridor pixels over the ROIs (0-1),
+                                 the expected count being the corridor area of the last mask;
+                                 finding far more pixels than expected (color leaking into the
+                                 background) lowers it as well.
+                   - drift: Largest x distance in pixels from the last segmented midpoints.
+        """
+        if not self.models:
+            return {roi_index: None for roi_index in self.active_rois}, 0.0, math.inf
+
+        height, width = frame.shape[:2]
+        rows, roi_height = roi_row_indices(height, self.active_rois, self.num_rois)
+        hsv = self.roi_bands(frame)
+
+        midpoints = {}
+        confidence = 1.0
+        drift = 0.0
+        for i, roi_index in enumerate(self.active_rois):
+            model = self.models.get(roi_index)
+            if model is None:
+                midpoints[roi_index] = None
+                continue
+            lower, upper, last_x, corridor_width, expected = model
+
+            # Search window around the last corridor
+            x0 = max(0, last_x - corridor_width)
+            x1 = min(width, last_x + corridor_width)
+            band = cv2.inRange(hsv[i, :, x0:x1], lower, upper)
+
+            found = calculate_roi_midpoints(band, [0], num_rois=1)[0]
+            matched = np.count_nonzero(band)
+            confidence = min(confidence, min(matched, expected) / max(matched, expected))
+            if found is None:
+                midpoints[roi_index] = None
+                confidence = 0.0
+                continue
+            midpoint_x = x0 + found[0]
+            midpoints[roi_index] = (midpoint_x, int(rows[i, 0] + roi_height // 2))
+            drift = max(drift, abs(midpoint_x - self.reference[roi_index][0]))
+
+        return midpoints, min(confidence, 1.0), drift
+
+
+class AdaptiveCadence:
+    def __init__(self, max_interval=8, min_confidence=0.5, max_drift=40, smoothing=0.2):
+        """
+        Decide on which frames to run segmentation.
+
+        Segmentation runs every N frames, where N follows the measured inference latency
+        divided by the camera frame interval, or earlier when tracking confidence drops or
+        the tracked midpoints drift too far from the last segmented ones.
+
+        Args:
+            max_interval (int): Upper bound for N.
+            min_confidence (float): Tracking confidence below which segmentation is forced.
+            max_drift (float): Midpoint drift in pixels above which segmentation is forced.
+            smoothing (float): Weight of new samples in the latency/interval moving averages.
+        """
+        self.max_interval = max_interval
+        self.min_confidence = min_confidence
+        self.max_drift = max_drift
+        self.smoothing = smoothing
+        self.inference_latency = None
+        self.frame_interval = None
+        self.last_frame_time = None
+        self.last_frame_seq = None
+        self.frames_since_segmentation = math.inf
+
+    def ema(self, current, sample):
+        return sample if current is None else current + self.smoothing * (sample - current)
+
+    def record_frame(self, capture_time, seq):
+        """
+        Track the camera frame interval from capture timestamps.
+
+        Args:
+            capture_time (float): time.monotonic() capture timestamp of the frame.
+            seq (int): Camera frame sequence number, so frames skipped by the grabber
+                       count towards the camera rate rather than the processing rate.
+        """
+        if self.last_frame_time is not None and seq > self.last_frame_seq:
+            interval = (capture_time - self.last_frame_time) / (seq - self.last_frame_seq)
+            self.frame_interval = self.ema(self.frame_interval, interval)
+        self.last_frame_time = capture_time
+        self.last_frame_seq = seq
+
+    def record_inference(self, seconds):
+        self.inference_latency = self.ema(self.inference_latency, seconds)
+        self.frames_since_segmentation = 0
+
+    @property
+    def interval(self):
+        """
+        Current segmentation interval N in frames.
+        """
+        if self.inference_latency is None or not self.frame_interval:
+            return 1
+        return max(1, min(self.max_interval, math.ceil(self.inference_latency / self.frame_interval)))
+
+    def due(self):
+        """
+        Return True if the schedule says the next frame should be segmented.
+        """
+        return self.frames_since_segmentation + 1 >= self.interval
+
+    def accept(self, confidence, drift):
+        """
+        Return True if a tracked estimate is good enough to use instead of segmenting.
+        """
+        return confidence >= self.min_confidence and drift <= self.max_drift
+
+    def record_tracked(self):
+        self.frames_since_segmentation += 1
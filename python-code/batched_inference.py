@@ -0,0 +1,125 @@
+import threading
+import time
+
+
+class InferenceRequest:
+    def __init__(self, frame):
+        self.frame = frame
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class BatchedInferenceServer:
+    def __init__(self, model, max_wait=0.02):
+        """
+        Collect frames from several camera threads into one batched model call per tick.
+
+        Each camera thread calls infer() with its newest frame and blocks until its own
+        result is ready. A tick starts with the first frame that arrives and ends when
+        every registered stream has submitted or `max_wait` seconds have passed, so a
+        slow or dead camera never holds the others back for longer than the deadline.
+
+        Args:
+            model (callable): Model taking a list of frames and returning one result per frame,
+                              e.g. YOLO(...) or a segmentation backend.
+            max_wait (float): Maximum seconds to wait for the other streams after the first frame.
+        """
+        self.model = model
+        self.max_wait = max_wait
+        self.streams = set()
+        self.pending = {}          # stream_id -> InferenceRequest for the next batch
+        self.condition = threading.Condition()
+        self.batches = 0
+        self.batched_frames = 0
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def register(self, stream_id):
+        with self.condition:
+            self.streams.add(stream_id)
+
+    def unregister(self, stream_id):
+        with self.condition:
+            self.streams.discard(stream_id)
+            self.condition.notify_all()
+
+    def infer(self, stream_id, frame, timeout=None):
+        """
+        Submit a frame for the next batch and wait for its result.
+
+        Args:
+            stream_id (str): Stream the frame belongs to.
+            frame (numpy.ndarray): The input video frame.
+            timeout (float or None): Seconds to wait for the result.
+
+        Returns:
+            The model result for this frame, or None on timeout.
+        """
+        request = InferenceRequest(frame)
+        with self.condition:
+            self.streams.add(stream_id)
+            self.pending[stream_id] = request
+            self.condition.notify_all()
+
+        if not request.done.wait(timeout):
+            return None
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def collect_batch(self):
+        """
+        Wait for the first frame, then for the other streams until the deadline.
+
+        Returns:
+            dict: stream_id -> InferenceRequest of the batch, empty when stopping.
+        """
+        with self.condition:
+            self.condition.wait_for(lambda: self.pending or not self.running)
+            if not self.running:
+                return {}
+            deadline = time.monotonic() + self.max_wait
+            while self.running and not self.streams.issubset(self.pending):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self.condition.wait(remaining)
+            batch, self.pending = self.pending, {}
+            return batch
+
+    def run(self):
+        """
+        Background loop running one batched model call per tick and demultiplexing results.
+        """
+        while self.running:
+            batch = self.collect_batch()
+            if not batch:
+                continue
+
+            requests = list(batch.values())
+            try:
+                results = self.model([request.frame for request in requests])
+                for request, result in zip(requests, results):
+                    request.result = result
+            except Exception as e:
+                for request in requests:
+                    request.error = e
+
+            self.batches += 1
+            self.batched_frames += len(requests)
+            for request in requests:
+                request.done.set()
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "mean_batch_size": self.batched_frames / self.batches if self.batches else 0.0,
+        }
+
+    def stop(self):
+        self.running = False
+        with self.condition:
+            self.condition.notify_all()
+        self.thread.join(timeout=1.0)
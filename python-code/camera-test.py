@@ -1,11 +1,15 @@
 import numpy as np
 import cv2
+from frame_bus import open_source
 
-#cap = cv2.VideoCapture(0) // for usb camera
-cap = cv2.VideoCapture('http://192.168.100.27:4747/video')
+#cap = open_source(0) // for usb camera
+#cap = open_source('bus:camera')  # Shared decode, start python-code/frame_bus.py first
+cap = open_source('http://192.168.100.27:4747/video')
 
 while(True):
     ret, frame = cap.read()
+    if not ret:
+        break
     frame = cv2.rotate(frame, cv2.ROTATE_90_CLOCKWISE)
     cv2.imshow('frame',frame)
     if cv2.waitKey(20) & 0xFF == ord('q'):
@@ -0,0 +1,210 @@
+import threading
+import time
+
+HOLD = "hold"                # Use the last measured error unchanged until it goes stale
+EXTRAPOLATE = "extrapolate"  # Project the last error forward with its measured rate of change
+
+
+class PIDController:
+    def __init__(self, Kp, Ki, Kd, output_limit=None, integral_limit=None, derivative_filter=0.5):
+        """
+        PID controller stepped with an explicit dt.
+
+        The integral only grows while the output is not saturated (conditional integration)
+        and is additionally clamped to `integral_limit`, so a long saturated turn does not
+        wind it up. The derivative acts on the error low-pass filtered with `derivative_filter`.
+
+        Args:
+            Kp, Ki, Kd (float): PID gains.
+            output_limit (float or None): Correction is clamped to [-output_limit, output_limit].
+            integral_limit (float or None): Integral term is clamped to this absolute value.
+            derivative_filter (float): Smoothing factor in [0, 1) of the derivative, 0 disables it.
+        """
+        self.Kp = Kp
+        self.Ki = Ki
+        self.Kd = Kd
+        self.output_limit = output_limit
+        self.integral_limit = integral_limit
+        self.derivative_filter = derivative_filter
+        self.reset()
+
+    def reset(self):
+        self.integral = 0.0
+        self.prev_error = None
+        self.derivative = 0.0
+
+    def clamp(self, value, limit):
+        if limit is None:
+            return value
+        return max(-limit, min(limit, value))
+
+    def update(self, error, dt, saturated=False):
+        """
+        Advance the controller by dt seconds.
+
+        Args:
+            error (float): Current error.
+            dt (float): Seconds since the previous update.
+            saturated (bool): The actuators could not follow the previous output; hold the integral.
+
+        Returns:
+            tuple: (correction, saturated) with saturated True when the output limit clipped it.
+        """
+        if dt > 0 and self.prev_error is not None:
+            raw = (error - self.prev_error) / dt
+            self.derivative = self.derivative_filter * self.derivative + (1 - self.derivative_filter) * raw
+        self.prev_error = error
+
+        unclamped = self.Kp * error + self.Ki * self.integral + self.Kd * self.derivative
+        correction = self.clamp(unclamped, self.output_limit)
+        clipped = correction != unclamped
+        # Integrate only when that does not push further into saturation
+        if dt > 0 and not ((clipped or saturated) and error * unclamped > 0):
+            self.integral = self.clamp(self.integral + error * dt, self.integral_limit)
+        return correction, clipped
+
+
+class FixedRateControlLoop:
+    def __init__(self, controller, base_speed, emit, rate=50, policy=HOLD, max_extrapolation=0.1,
+                 stale_timeout=0.5, min_speed=0, max_speed=255, clock=time.monotonic):
+        """
+        Run the steering PID on its own thread at a fixed rate, independent of the frame rate.
+
+        Vision hands every new steering error to update() with its capture time. Each tick
+        takes the newest measurement and its age, holds or extrapolates it according to
+        `policy`, steps the PID with the real tick interval and emits motor speeds. Once the
+        newest measurement is older than `stale_timeout` the loop emits a stop command and
+        resets the PID until vision delivers again.
+
+        Args:
+            controller (PIDController): Controller stepped every tick.
+            base_speed (float): Speed of both motors at zero correction.
+            emit (callable): emit(left_speed, right_speed, capture_time) for every tick's command.
+            rate (float): Ticks per second.
+            policy (str): HOLD or EXTRAPOLATE.
+            max_extrapolation (float): Extrapolate at most this many seconds past a measurement.
+            stale_timeout (float): Measurement age in seconds after which the robot is stopped.
+            min_speed, max_speed (float): Motor speed limits; hitting them counts as saturation.
+            clock (callable): Monotonic clock the capture times are on.
+        """
+        if policy not in (HOLD, EXTRAPOLATE):
+            raise ValueError(f"Unknown measurement policy: {policy}")
+        self.controller = controller
+        self.base_speed = base_speed
+        self.emit = emit
+        self.period = 1.0 / rate
+        self.policy = policy
+        self.max_extrapolation = max_extrapolation
+        self.stale_timeout = stale_timeout
+        self.min_speed = min_speed
+        self.max_speed = max_speed
+        self.clock = clock
+
+        self.lock = threading.Lock()
+        self.measurement = None     # (error, capture_time)
+        self.error_rate = 0.0       # Error change per second between the last two measurements
+        self.last_command = None
+        self.saturated = False
+        self.ticks = 0
+        self.overruns = 0           # Ticks started more than a period late
+        self.stale_ticks = 0
+        self.measured_ticks = 0     # Ticks acting on a fresh measurement
+        self.age_total = 0.0
+
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def update(self, error, capture_time):
+        """
+        Hand over a new vision measurement; older ones arriving late are ignored.
+
+        Args:
+            error (float or None): Steering error in pixels, None when the path was lost.
+            capture_time (float): Capture time of the frame it was measured on.
+        """
+        if error is None:
+            return
+        with self.lock:
+            if self.measurement is not None:
+                prev_error, prev_time = self.measurement
+                if capture_time <= prev_time:
+                    return
+                self.error_rate = (error - prev_error) / (capture_time - prev_time)
+            self.measurement = (error, capture_time)
+
+    def estimate(self, now):
+        """
+        Error to act on at `now` with the measurement it is based on.
+
+        Returns:
+            tuple: (error, capture_time, age), error None without a fresh measurement.
+        """
+        with self.lock:
+            measurement, error_rate = self.measurement, self.error_rate
+        if measurement is None:
+            return None, None, None
+        error, capture_time = measurement
+        age = now - capture_time
+        if age > self.stale_timeout:
+            return None, capture_time, age
+        if self.policy == EXTRAPOLATE:
+            error += error_rate * min(max(age, 0.0), self.max_extrapolation)
+        return error, capture_time, age
+
+    def step(self, now, dt):
+        """
+        Compute and emit the command of one tick.
+        """
+        error, capture_time, age = self.estimate(now)
+        if error is None:
+            if self.measurement is not None:
+                self.stale_ticks += 1
+                if self.last_command != (0, 0):
+                    self.controller.reset()
+                    self.last_command = (0, 0)
+                    self.emit(0, 0, capture_time)
+            return
+
+        correction, clipped = self.controller.update(error, dt, self.saturated)
+        left_speed = self.base_speed - correction
+        right_speed = self.base_speed + correction
+        limited_left = max(self.min_speed, min(self.max_speed, left_speed))
+        limited_right = max(self.min_speed, min(self.max_speed, right_speed))
+        self.saturated = clipped or limited_left != left_speed or limited_right != right_speed
+
+        self.measured_ticks += 1
+        self.age_total += age
+        self.last_command = (limited_left, limited_right)
+        self.emit(limited_left, limited_right, capture_time)
+
+    def run(self):
+        """
+        Tick on absolute deadlines so the rate does not drift with the work done per tick.
+        """
+        next_tick = self.clock()
+        last_tick = next_tick
+        while self.running:
+            now = self.clock()
+            if now < next_tick:
+                time.sleep(next_tick - now)
+                now = self.clock()
+            if now - next_tick > self.period:
+                self.overruns += 1
+                next_tick = now  # Skip missed ticks instead of bursting to catch up
+            self.ticks += 1
+            try:
+                self.step(now, now - last_tick)
+            except Exception as e:
+                print(f"Control loop error: {e}")
+            last_tick = now
+            next_tick += self.period
+
+    def stats(self):
+        return {"ticks": self.ticks, "overruns": self.overruns, "stale_ticks": self.stale_ticks,
+                "mean_measurement_age_ms": self.age_total / self.measured_ticks * 1000.0
+                if self.measured_ticks else None}
+
+    def stop(self):
+        self.running = False
+        self.thread.join(timeout=1.0)
@@ -0,0 +1,157 @@
+import cv2
+import threading
+import time
+
+
+class DebugRenderer:
+    def __init__(self, active_rois, num_rois=10, fps=10, show_windows=True):
+        """
+        Build debug frames off the control thread, only while a viewer is attached.
+
+        The control loop hands over references with submit(), which is cheap and never
+        blocks. A background thread annotates the newest submission at most `fps` times
+        per second. Rendered frames go to attached callbacks and, when show_windows is
+        set, to OpenCV windows refreshed by show() (HighGUI must be driven from the main
+        thread on some platforms). show() also checks whether any debug window is still
+        visible; once all of them are closed and no callback is attached, submit() skips
+        rendering altogether.
+
+        Args:
+            active_rois (list of int): ROI indices highlighted in the ROI view.
+            num_rois (int): Number of horizontal ROI bands in the frame.
+            fps (float): Maximum render rate.
+            show_windows (bool): Display the rendered frames with cv2.imshow.
+        """
+        self.active_rois = active_rois
+        self.num_rois = num_rois
+        self.interval = 1.0 / fps if fps > 0 else 0.0
+        self.show_windows = show_windows
+        self.window_names = []     # Windows opened by show()
+        self.window_visible = True  # Until show() finds every window closed
+        self.viewers = []
+
+        self.pending = None    # Newest submission not rendered yet
+        self.rendered = None   # Newest rendered frames, waiting for show()
+        self.condition = threading.Condition()
+        self.running = True
+        self.thread = threading.Thread(target=self.render_loop, daemon=True)
+        self.thread.start()
+
+    @property
+    def viewer_attached(self):
+        return (self.show_windows and self.window_visible) or len(self.viewers) > 0
+
+    def windows_visible(self):
+        """
+        True while at least one debug window is open; call from the thread driving HighGUI.
+        """
+        try:
+            return any(cv2.getWindowProperty(name, cv2.WND_PROP_VISIBLE) >= 1 for name in self.window_names)
+        except cv2.error:
+            return False
+
+    def attach(self, callback):
+        """
+        Attach a viewer called with a dict of {window_name: frame} for every rendered frame.
+        """
+        self.viewers.append(callback)
+
+    def detach(self, callback):
+        self.viewers.remove(callback)
+
+    def submit(self, frame, result, binary_mask, midpoints):
+        """
+        Queue the newest frame for rendering, replacing any unrendered one.
+
+        Args:
+            frame (numpy.ndarray): The input video frame.
+            result: YOLO result for the frame (annotated with result.plot()), None for tracked frames.
+            binary_mask (numpy.ndarray or None): Binary mask frame, None for tracked frames.
+            midpoints (dict): Dictionary of midpoints for active ROIs in frame coordinates.
+        """
+        if not self.viewer_attached:
+            return
+        with self.condition:
+            self.pending = (frame, result, binary_mask, midpoints)
+            self.condition.notify()
+
+    def render(self, frame, result, binary_mask, midpoints):
+        """
+        Build the annotated, mask and ROI debug frames.
+
+        Returns:
+            dict: Debug frames keyed by window name.
+        """
+        roi_frame = frame.copy()
+        height, width = roi_frame.shape[:2]
+        roi_height = height // self.num_rois
+
+        for roi_index in range(self.num_rois):
+            start_y = roi_index * roi_height
+            end_y = (roi_index + 1) * roi_height
+            color = (255, 0, 0) if roi_index in self.active_rois else (100, 100, 100)
+            thickness = 2 if roi_index in self.active_rois else 1
+            cv2.rectangle(roi_frame, (0, start_y), (width, end_y), color, thickness)
+
+        for point in midpoints.values():
+            if point is not None:
+                cv2.circle(roi_frame, point, 5, (0, 255, 0), -1)
+
+        frames = {'ROI Midpoints': roi_frame}
+        if result is not None:
+            frames['YOLO Annotated Frame'] = result.plot()
+        if binary_mask is not None:
+            frames['Binary Segmentation Mask'] = binary_mask
+        return frames
+
+    def render_loop(self):
+        """
+        Background loop rendering the newest submission at the configured rate.
+        """
+        while self.running:
+            with self.condition:
+                self.condition.wait_for(lambda: self.pending is not None or not self.running)
+                if not self.running:
+                    break
+                submission, self.pending = self.pending, None
+
+            started = time.monotonic()
+            frames = self.render(*submission)
+            with self.condition:
+                self.rendered = frames
+            for callback in list(self.viewers):
+                callback(frames)
+
+            time.sleep(max(0.0, started + self.interval - time.monotonic()))
+
+    def show(self):
+        """
+        Push the newest rendered frames to the OpenCV windows.
+
+        Returns:
+            int: Key code from cv2.waitKey, or -1 when windows are disabled.
+        """
+        if not self.show_windows:
+            return -1
+        with self.condition:
+            frames, self.rendered = self.rendered, None
+        if frames is not None:
+            for name, image in frames.items():
+                cv2.imshow(name, image)
+                if name not in self.window_names:
+                    self.window_names.append(name)
+        key = cv2.waitKey(1)
+        if self.window_names:
+            self.window_visible = self.windows_visible()
+        return key
+
+    def stop(self):
+        """
+        Stop the render thread and close display windows.
+        """
+        self.running = False
+        with self.condition:
+            self.condition.notify_all()
+        self.thread.join(timeout=1.0)
+        if self.show_windows:
+            cv2.destroyAllWindows()
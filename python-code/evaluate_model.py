@@ -0,0 +1,234 @@
+import argparse
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from mask_utils import union_masks, mask_for_frame
+from pipeline_bench import IMAGE_EXTENSIONS, StubSegmentationModel, summarize
+from roi_midpoints import calculate_roi_midpoints
+
+
+def label_path_for(image_path, labels_dir):
+    """
+    Find the label of an image: a YOLO polygon .txt or a mask .png with the same stem.
+
+    Without labels_dir the Roboflow/YOLO layout is assumed (.../images/x.jpg -> .../labels/x.txt).
+    """
+    stem = os.path.splitext(os.path.basename(image_path))[0]
+    if labels_dir is None:
+        labels_dir = os.path.join(os.path.dirname(os.path.dirname(image_path)), "labels")
+    for ext in (".txt", ".png"):
+        candidate = os.path.join(labels_dir, stem + ext)
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+
+def load_label_mask(path, shape, classes=None):
+    """
+    Rasterize a label into a binary mask of the image size, the union of all instances.
+
+    Args:
+        path (str): YOLO segmentation .txt (class x1 y1 x2 y2 ... normalized) or mask .png.
+        shape (tuple): Image shape.
+        classes (set of int or None): Only use these classes from .txt labels.
+
+    Returns:
+        numpy.ndarray: uint8 mask, 255 on the labelled area.
+    """
+    height, width = shape[:2]
+    if path.endswith(".png"):
+        mask = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+        if mask.shape != (height, width):
+            mask = cv2.resize(mask, (width, height), interpolation=cv2.INTER_NEAREST)
+        return np.where(mask > 0, 255, 0).astype(np.uint8)
+
+    mask = np.zeros((height, width), dtype=np.uint8)
+    polygons = []
+    with open(path) as file:
+        for line in file:
+            values = line.split()
+            if len(values) < 7 or (classes is not None and int(values[0]) not in classes):
+                continue
+            points = np.array(values[1:], dtype=np.float32).reshape(-1, 2) * (width, height)
+            polygons.append(np.round(points).astype(np.int32))
+    if polygons:
+        cv2.fillPoly(mask, polygons, 255)
+    return mask
+
+
+def load_sample(image_path, labels_dir, size, classes):
+    """
+    Decode an image and its label on a prefetch thread (OpenCV releases the GIL here).
+
+    Returns:
+        tuple: (image_path, frame, label_mask or None)
+    """
+    frame = cv2.imread(image_path)
+    if frame is None:
+        return image_path, None, None
+    if size is not None and (frame.shape[1], frame.shape[0]) != size:
+        frame = cv2.resize(frame, size, interpolation=cv2.INTER_LINEAR)
+    label = label_path_for(image_path, labels_dir)
+    mask = load_label_mask(label, frame.shape, classes) if label is not None else None
+    return image_path, frame, mask
+
+
+def prefetch_batches(paths, batch_size, loader, workers):
+    """
+    Yield batches of loaded samples, keeping at most two batches decoded or decoding.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        window = deque()
+        batch = []
+        for path in paths:
+            window.append(executor.submit(loader, path))
+            if len(window) >= 2 * batch_size:
+                batch.append(window.popleft().result())
+                if len(batch) == batch_size:
+                    yield batch
+                    batch = []
+        while window:
+            batch.append(window.popleft().result())
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+class Evaluation:
+    def __init__(self, active_rois):
+        """
+        Running totals of mask IoU and ROI midpoint error, a few numbers per image.
+        """
+        self.active_rois = active_rois
+        self.images = 0
+        self.labelled = 0
+        self.intersection = 0
+        self.union = 0
+        self.ious = []
+        self.x_errors = {roi: [] for roi in active_rois}
+        self.missed = {roi: 0 for roi in active_rois}       # Label has a midpoint, prediction not
+        self.spurious = {roi: 0 for roi in active_rois}     # Prediction has a midpoint, label not
+
+    def add(self, predicted, label):
+        self.images += 1
+        if label is None:
+            return
+        self.labelled += 1
+        pred = predicted > 0
+        true = label > 0
+        intersection = int(np.count_nonzero(pred & true))
+        union = int(np.count_nonzero(pred | true))
+        self.intersection += intersection
+        self.union += union
+        self.ious.append(intersection / union if union else 1.0)
+
+        # The controller only sees the ROI midpoints, so score those directly
+        predicted_points = calculate_roi_midpoints(predicted, self.active_rois)
+        true_points = calculate_roi_midpoints(label, self.active_rois)
+        for roi in self.active_rois:
+            p, t = predicted_points[roi], true_points[roi]
+            if p is not None and t is not None:
+                self.x_errors[roi].append(abs(p[0] - t[0]))
+            elif t is not None:
+                self.missed[roi] += 1
+            elif p is not None:
+                self.spurious[roi] += 1
+
+    def report(self):
+        rois = {}
+        for roi in self.active_rois:
+            errors = np.asarray(self.x_errors[roi], dtype=np.float64)
+            rois[str(roi)] = {
+                "matched": int(errors.size),
+                "mean_abs_x_error_px": float(errors.mean()) if errors.size else None,
+                "p95_abs_x_error_px": float(np.percentile(errors, 95)) if errors.size else None,
+                "missed": self.missed[roi],
+                "spurious": self.spurious[roi],
+            }
+        return {
+            "images": self.images,
+            "labelled": self.labelled,
+            "dataset_iou": self.intersection / self.union if self.union else None,
+            "mean_image_iou": float(np.mean(self.ious)) if self.ious else None,
+            "roi_midpoints": rois,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batched offline evaluation of a segmentation model on an image folder.")
+    parser.add_argument("images", help="Image directory, e.g. datasets/<name>/test/images.")
+    parser.add_argument("--labels", default=None, help="Label directory (default: sibling 'labels' directory).")
+    parser.add_argument("--model", default="stub", help="YOLO weights path, or 'stub' for the CPU stand-in.")
+    parser.add_argument("--backend", default="torch", help="Inference backend: torch, onnx, openvino or auto.")
+    parser.add_argument("--imgsz", type=int, default=640, help="Model input size.")
+    parser.add_argument("--batch", type=int, default=16, help="Images per model call.")
+    parser.add_argument("--workers", type=int, default=4, help="Image decoding threads.")
+    parser.add_argument("--size", default=None, help="Resize images to WIDTHxHEIGHT first, e.g. 640x480 like the camera.")
+    parser.add_argument("--classes", default=None, help="Comma separated label classes forming the path (default: all).")
+    parser.add_argument("--active-rois", default="2,5,7", help="Comma separated ROI indices.")
+    parser.add_argument("--limit", type=int, default=None, help="Evaluate at most this many images.")
+    parser.add_argument("--output", default=None, help="Write the JSON report to this file.")
+    args = parser.parse_args()
+
+    paths = sorted(os.path.join(args.images, name) for name in os.listdir(args.images)
+                   if name.lower().endswith(IMAGE_EXTENSIONS))[:args.limit]
+    size = tuple(int(v) for v in args.size.lower().split("x")) if args.size else None
+    classes = {int(v) for v in args.classes.split(",")} if args.classes else None
+    active_rois = [int(v) for v in args.active_rois.split(",")]
+
+    if args.model == "stub":
+        model = StubSegmentationModel(imgsz=args.imgsz)
+    else:
+        from segmentation_backend import load_backend
+        model = load_backend(args.model, args.backend, imgsz=args.imgsz)
+
+    evaluation = Evaluation(active_rois)
+    batch_times = []
+    unreadable = 0
+    loader = lambda path: load_sample(path, args.labels, size, classes)
+    start = time.perf_counter()
+    for batch in prefetch_batches(paths, args.batch, loader, args.workers):
+        samples = [sample for sample in batch if sample[1] is not None]
+        unreadable += len(batch) - len(samples)
+        if not samples:
+            continue
+
+        t0 = time.perf_counter()
+        results = model([frame for _, frame, _ in samples])
+        batch_times.append(time.perf_counter() - t0)
+
+        for (_, frame, label), result in zip(samples, results):
+            if result.masks is not None:
+                predicted, _ = mask_for_frame(union_masks(result.masks.data), frame.shape)
+            else:
+                predicted = np.zeros(frame.shape[:2], dtype=np.uint8)
+            evaluation.add(predicted, label)
+    elapsed = time.perf_counter() - start
+
+    report = evaluation.report()
+    report["unreadable"] = unreadable
+    report["throughput"] = {
+        "images_per_s": evaluation.images / elapsed if elapsed > 0 else None,
+        "inference_images_per_s": evaluation.images / sum(batch_times) if batch_times else None,
+        "batch_latency": summarize(batch_times),
+    }
+    report["config"] = {"images": args.images, "model": args.model, "backend": args.backend if args.model != "stub" else "stub",
+                        "imgsz": args.imgsz, "batch": args.batch, "size": args.size, "active_rois": active_rois}
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
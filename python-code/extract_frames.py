@@ -0,0 +1,258 @@
+import argparse
+import csv
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2
+import numpy as np
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv", ".m4v")
+MANIFEST_FIELDS = ["image", "video", "frame_index", "timestamp_s", "phash"]
+VIDEO_FIELDS = ["video", "size", "mtime", "sampled", "kept"]
+
+
+def dhash(frame):
+    """
+    64-bit difference hash: brighter-than-right-neighbour bits of a 9x8 grey thumbnail.
+
+    Args:
+        frame (numpy.ndarray): BGR or grey image.
+
+    Returns:
+        numpy.uint64: Hash; near-identical images differ in few bits.
+    """
+    grey = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+    small = cv2.resize(grey, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return np.packbits(bits).view(">u8")[0].astype(np.uint64)
+
+
+def hamming(hashes, value):
+    """
+    Bit distance between every hash in an array and one hash.
+    """
+    return np.bitwise_count(np.bitwise_xor(hashes, np.uint64(value)))
+
+
+class HashIndex:
+    def __init__(self, hashes=()):
+        """
+        Perceptual hashes of every image in the dataset, searched by Hamming distance.
+        """
+        self.hashes = np.array(list(hashes), dtype=np.uint64)
+        self.count = len(self.hashes)
+
+    def contains_near(self, value, max_distance):
+        if self.count == 0:
+            return False
+        return bool(hamming(self.hashes[:self.count], value).min() <= max_distance)
+
+    def add(self, value):
+        if self.count == len(self.hashes):
+            grown = np.zeros(max(1024, 2 * len(self.hashes)), dtype=np.uint64)
+            grown[:self.count] = self.hashes[:self.count]
+            self.hashes = grown
+        self.hashes[self.count] = value
+        self.count += 1
+
+
+def resize_to_width(frame, width):
+    if width is None or frame.shape[1] == width:
+        return frame
+    height = round(frame.shape[0] * width / frame.shape[1])
+    return cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+
+
+def extract_chunk(video, start_frame, end_frame, every, motion, max_distance, width, quality):
+    """
+    Decode frames [start_frame, end_frame) of a video and return the sampled, locally deduplicated ones.
+
+    Frames before the next sampling time are only grabbed, never converted. A frame is
+    sampled when `every` seconds have passed since the last sampled one and, with a motion
+    threshold, when its thumbnail differs enough from the last sampled frame.
+
+    Returns:
+        tuple: (video, start_frame, sampled, kept) with kept a list of
+               (frame_index, timestamp_s, phash, jpeg_bytes).
+    """
+    cap = cv2.VideoCapture(video)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    if start_frame:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+    step = max(1, round(every * fps))
+
+    kept = []
+    recent = HashIndex()
+    last_thumbnail = None
+    sampled = 0
+    index = start_frame
+    next_index = start_frame
+    while index < end_frame:
+        if index < next_index:
+            if not cap.grab():
+                break
+            index += 1
+            continue
+        ret, frame = cap.read()
+        if not ret:
+            break
+
+        if motion is not None:
+            thumbnail = cv2.resize(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), (64, 36),
+                                   interpolation=cv2.INTER_AREA).astype(np.int16)
+            moved = last_thumbnail is None or np.abs(thumbnail - last_thumbnail).mean() >= motion
+            if not moved:
+                index += 1
+                next_index = index  # Check the following frames until the scene moves
+                continue
+            last_thumbnail = thumbnail
+
+        sampled += 1
+        value = dhash(frame)
+        if not recent.contains_near(value, max_distance):
+            recent.add(value)
+            ok, jpeg = cv2.imencode(".jpg", resize_to_width(frame, width), [cv2.IMWRITE_JPEG_QUALITY, quality])
+            if ok:
+                kept.append((index, index / fps, int(value), jpeg.tobytes()))
+        index += 1
+        next_index = index - 1 + step
+    cap.release()
+    return video, start_frame, sampled, kept
+
+
+def video_chunks(video, chunk_seconds):
+    """
+    Split a video into frame ranges so long videos decode on several workers.
+    """
+    cap = cv2.VideoCapture(video)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    if frames <= 0 or not chunk_seconds:
+        return [(0, np.iinfo(np.int64).max)]
+    size = max(1, int(chunk_seconds * fps))
+    return [(start, min(start + size, frames)) for start in range(0, frames, size)]
+
+
+def find_videos(inputs):
+    videos = []
+    for path in inputs:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                videos += [os.path.join(root, name) for name in sorted(files) if name.lower().endswith(VIDEO_EXTENSIONS)]
+        else:
+            videos.append(path)
+    return videos
+
+
+def read_csv_rows(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, newline="") as file:
+        return list(csv.DictReader(file))
+
+
+def open_appending(path, fields):
+    new = not os.path.exists(path)
+    file = open(path, "a", newline="")
+    writer = csv.DictWriter(file, fieldnames=fields)
+    if new:
+        writer.writeheader()
+    return file, writer
+
+
+def image_prefix(video):
+    """
+    File name prefix for a video's images: its stem plus a short hash of its absolute path,
+    so same-named videos in different directories never overwrite each other's images.
+    """
+    stem = os.path.splitext(os.path.basename(video))[0]
+    digest = hashlib.sha1(os.path.abspath(video).encode("utf-8")).hexdigest()[:8]
+    return f"{stem}-{digest}"
+
+
+def video_key(video):
+    stat = os.stat(video)
+    return os.path.abspath(video), str(stat.st_size), str(int(stat.st_mtime))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract deduplicated training images from driving videos.")
+    parser.add_argument("inputs", nargs="+", help="Video files or directories.")
+    parser.add_argument("--output", default="data", help="Image directory; manifest.csv and videos.csv go here too.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Decoding processes.")
+    parser.add_argument("--every", type=float, default=0.5, help="Minimum seconds between sampled frames.")
+    parser.add_argument("--motion", type=float, default=None,
+                        help="Also require this mean grey-level change (0-255) since the last sampled frame.")
+    parser.add_argument("--max-distance", type=int, default=6,
+                        help="Frames within this many hash bits of an existing image are duplicates.")
+    parser.add_argument("--width", type=int, default=640, help="Output image width, 0 keeps the original size.")
+    parser.add_argument("--quality", type=int, default=95, help="JPEG quality.")
+    parser.add_argument("--chunk-seconds", type=float, default=60.0, help="Split videos into chunks of this length.")
+    args = parser.parse_args()
+
+    os.makedirs(args.output, exist_ok=True)
+    manifest_path = os.path.join(args.output, "manifest.csv")
+    videos_path = os.path.join(args.output, "videos.csv")
+
+    # Earlier runs: skip videos already done, dedup new images against every existing one
+    done = {(row["video"], row["size"], row["mtime"]) for row in read_csv_rows(videos_path)}
+    index = HashIndex(int(row["phash"], 16) for row in read_csv_rows(manifest_path))
+    todo = [video for video in find_videos(args.inputs) if video_key(video) not in done]
+    print(f"{len(todo)} new videos, {index.count} images already in the dataset")
+    if not todo:
+        return
+
+    manifest_file, manifest = open_appending(manifest_path, MANIFEST_FIELDS)
+    videos_file, videos_writer = open_appending(videos_path, VIDEO_FIELDS)
+    width = args.width or None
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        pending = {}   # video -> {start_frame: result}, written once every chunk is back
+        chunk_counts = {}
+        futures = []
+        for video in todo:
+            chunks = video_chunks(video, args.chunk_seconds)
+            chunk_counts[video] = len(chunks)
+            pending[video] = {}
+            futures += [executor.submit(extract_chunk, video, start, end, args.every, args.motion,
+                                        args.max_distance, width, args.quality) for start, end in chunks]
+
+        for future in as_completed(futures):
+            video, start_frame, sampled, kept = future.result()
+            pending[video][start_frame] = (sampled, kept)
+            if len(pending[video]) < chunk_counts[video]:
+                continue
+
+            # Dedup in frame order against the whole dataset, then write this video's images
+            chunks = pending.pop(video)
+            results = [chunks[start] for start in sorted(chunks)]
+            prefix = image_prefix(video)
+            total_sampled, total_kept = 0, 0
+            for sampled, kept in results:
+                total_sampled += sampled
+                for frame_index, timestamp, value, jpeg in kept:
+                    if index.contains_near(value, args.max_distance):
+                        continue
+                    index.add(value)
+                    name = f"{prefix}_{frame_index:06d}.jpg"
+                    with open(os.path.join(args.output, name), "wb") as image:
+                        image.write(jpeg)
+                    manifest.writerow({"image": name, "video": os.path.abspath(video), "frame_index": frame_index,
+                                       "timestamp_s": f"{timestamp:.3f}", "phash": f"{value:016x}"})
+                    total_kept += 1
+
+            path, size, mtime = video_key(video)
+            videos_writer.writerow({"video": path, "size": size, "mtime": mtime,
+                                    "sampled": total_sampled, "kept": total_kept})
+            manifest_file.flush()
+            videos_file.flush()
+            print(f"{video}: {total_sampled} sampled, {total_kept} kept")
+
+    manifest_file.close()
+    videos_file.close()
+    print(f"Dataset now has {index.count} images")
+
+
+if __name__ == "__main__":
+    main()
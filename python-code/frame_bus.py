@@ -0,0 +1,235 @@
+import argparse
+import threading
+import time
+
+import cv2
+
+from frame_grabber import LatestFrameGrabber
+from frame_ring import SharedFrameRing, attach_shared_memory
+
+BUS_PREFIX = "bus:"  # Sources like "bus:camera" read from a running frame bus
+
+
+def bus_memory_name(name):
+    return f"segnav-bus-{name}"
+
+
+class FrameBusProducer:
+    def __init__(self, source, name="camera", slots=8):
+        """
+        Decode a camera stream once and publish every frame to local processes.
+
+        Frames go into a shared memory ring named after the bus. The producer never waits
+        for subscribers: each one reads at its own pace and simply misses frames the ring
+        has overwritten. Decoding and reconnects are done by LatestFrameGrabber.
+
+        Args:
+            source (str or int): Stream URL (RTSP/HTTP) or camera index.
+            name (str): Bus name, subscribers open it as "bus:<name>".
+            slots (int): Frames kept in the ring; a subscriber has slots / fps seconds to use a frame.
+        """
+        self.source = source
+        self.name = name
+        self.slots = slots
+        self.grabber = LatestFrameGrabber(source)
+        self.ring = None
+        self.running = False
+
+    def create_ring(self, shape):
+        memory_name = bus_memory_name(self.name)
+        try:
+            return SharedFrameRing(memory_name, slots=self.slots, shape=shape)
+        except FileExistsError:
+            # Left behind by a producer that did not shut down cleanly
+            stale = attach_shared_memory(memory_name)
+            stale.close()
+            stale.unlink()
+            return SharedFrameRing(memory_name, slots=self.slots, shape=shape)
+
+    def run(self):
+        """
+        Publish frames until the stream ends or stop() is called.
+        """
+        self.running = True
+        try:
+            while self.running:
+                ret, frame, capture_time, _ = self.grabber.read_latest(timeout=1.0)
+                if not ret:
+                    if not self.grabber.isOpened():
+                        break
+                    continue
+                if self.ring is None:
+                    self.ring = self.create_ring(frame.shape)
+                    self.ring.fps = self.grabber.get(cv2.CAP_PROP_FPS) or 0.0
+                    print(f"Publishing {self.source} on {BUS_PREFIX}{self.name} ({frame.shape[1]}x{frame.shape[0]})")
+                if frame.shape[:2] != self.ring.shape[:2]:
+                    frame = cv2.resize(frame, (self.ring.shape[1], self.ring.shape[0]))
+                self.ring.write(frame, capture_time)
+        finally:
+            self.close()
+
+    def stats(self):
+        stats = self.grabber.stats()
+        stats["published"] = self.ring.latest() + 1 if self.ring is not None else 0
+        return stats
+
+    def stop(self):
+        self.running = False
+
+    def close(self):
+        self.running = False
+        self.grabber.release()
+        if self.ring is not None:
+            self.ring.mark_closed()
+            self.ring.close()
+            self.ring = None
+
+
+class FrameBusSubscriber:
+    def __init__(self, name="camera", max_fps=None, copy=True, open_timeout=5.0, poll_interval=0.002):
+        """
+        Read frames from a FrameBusProducer, usable in place of a cv2.VideoCapture.
+
+        Frames are private copies, verified after copying to be the frame that was asked for.
+        With `copy=False` they are views into shared memory (zero copy) instead, which the
+        producer overwrites when it wraps around the ring: such callers must check
+        valid(seq) after using a frame and drop whatever they computed from it when that
+        fails. Like LatestFrameGrabber, read() always returns the newest frame.
+
+        Args:
+            name (str): Bus name given to the producer.
+            max_fps (float or None): Return at most this many frames per second.
+            copy (bool): Return private copies; False returns shared memory views.
+            open_timeout (float): Seconds to wait for the producer to appear.
+            poll_interval (float): Sleep between checks for a new frame.
+        """
+        self.name = name
+        self.min_interval = 1.0 / max_fps if max_fps else 0.0
+        self.copy = copy
+        self.poll_interval = poll_interval
+        self.ring = None
+        self.read_seq = -1
+        self.last_read_time = 0.0
+        self.frames = 0
+        self.dropped_frames = 0      # Frames published but never returned to this subscriber
+
+        deadline = time.monotonic() + open_timeout
+        while self.ring is None:
+            try:
+                self.ring = SharedFrameRing(bus_memory_name(name), create=False)
+            except FileNotFoundError:
+                if time.monotonic() > deadline:
+                    raise ValueError(f"No frame bus named {name} is running")
+                time.sleep(0.1)
+
+    def read_latest(self, timeout=None):
+        """
+        Wait for a frame newer than the last one read and return it with its metadata.
+
+        Returns:
+            tuple: (ret, frame, capture_time, seq), same as LatestFrameGrabber.read_latest().
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        wait = self.last_read_time + self.min_interval - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+
+        while self.ring is not None:
+            seq = self.ring.latest()
+            if seq > self.read_seq:
+                entry = self.ring.read(seq)
+                if entry is not None:
+                    frame, capture_time = entry
+                    if self.copy:
+                        frame = frame.copy()
+                        if not self.ring.valid(seq):
+                            continue
+                    if self.read_seq >= 0:
+                        self.dropped_frames += seq - self.read_seq - 1
+                    self.read_seq = seq
+                    self.frames += 1
+                    self.last_read_time = time.monotonic()
+                    return True, frame, capture_time, seq
+            if self.ring.closed() or (deadline is not None and time.monotonic() >= deadline):
+                break
+            time.sleep(self.poll_interval)
+        return False, None, None, self.read_seq
+
+    def read(self):
+        """
+        cv2.VideoCapture compatible read() returning the newest frame.
+
+        Returns:
+            tuple: (ret, frame)
+        """
+        ret, frame, _, _ = self.read_latest(timeout=5.0)
+        return ret, frame
+
+    def valid(self, seq):
+        """
+        True while the frame with this sequence number has not been overwritten.
+        """
+        return self.ring is not None and self.ring.valid(seq)
+
+    def isOpened(self):
+        return self.ring is not None and not self.ring.closed()
+
+    def get(self, prop_id):
+        if prop_id == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.ring.shape[1])
+        if prop_id == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.ring.shape[0])
+        if prop_id == cv2.CAP_PROP_FPS:
+            return self.ring.fps
+        return 0.0
+
+    def stats(self):
+        return {"frames": self.frames, "dropped_frames": self.dropped_frames,
+                "published": self.ring.latest() + 1 if self.ring is not None else 0}
+
+    def release(self):
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+
+
+def open_source(source, fallback=LatestFrameGrabber, copy=True):
+    """
+    Open "bus:<name>" sources as frame bus subscribers and anything else with `fallback`.
+
+    Args:
+        source (str or int): "bus:<name>", stream URL or camera index.
+        fallback (callable): Capture class for non-bus sources, e.g. cv2.VideoCapture.
+        copy (bool): Bus frames as private copies; only pass False when every frame is
+                     checked with valid(seq) after use.
+    """
+    if isinstance(source, str) and source.startswith(BUS_PREFIX):
+        return FrameBusSubscriber(source[len(BUS_PREFIX):], copy=copy)
+    return fallback(source)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Decode a camera once and share its frames with local processes.")
+    parser.add_argument("source", help="Stream URL or camera index.")
+    parser.add_argument("--name", default="camera", help="Bus name; consumers open 'bus:<name>'.")
+    parser.add_argument("--slots", type=int, default=8, help="Frames kept in shared memory.")
+    parser.add_argument("--stats-interval", type=float, default=10.0, help="Seconds between stats lines.")
+    args = parser.parse_args()
+
+    source = int(args.source) if args.source.isdigit() else args.source
+    producer = FrameBusProducer(source, name=args.name, slots=args.slots)
+
+    def report():
+        while True:
+            time.sleep(args.stats_interval)
+            print(producer.stats())
+
+    threading.Thread(target=report, daemon=True).start()
+    try:
+        producer.run()
+    except KeyboardInterrupt:
+        print("\nFrame bus stopped.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+import cv2
+import os
+import threading
+import time
+
+
+class LatestFrameGrabber:
+    def __init__(self, source, stall_timeout=2.0, backoff_initial=0.5, backoff_max=8.0, live=None,
+                 max_abandoned_readers=2):
+        """
+        Decode a video stream on a background thread and keep only the newest frame.
+
+        The grabber can be used in place of a cv2.VideoCapture: read(), isOpened(),
+        get() and release() behave the same, except read() always returns the most
+        recent frame instead of the oldest one sitting in OpenCV's buffer.
+
+        Each reader thread owns its capture and releases it when it exits, so a capture is
+        never released while cap.read() is running on it. A watchdog thread starts a new
+        reader on a fresh capture when read() has been blocked for `stall_timeout`, with the
+        same exponential backoff as reconnects after failed reads; the abandoned reader exits
+        and releases its capture if read() ever returns. At most `max_abandoned_readers` are
+        left blocked at a time, so a camera that keeps hanging does not pile up threads.
+
+        Video files are not reconnected: the end of the file ends the stream.
+
+        Args:
+            source (str or int): Stream URL (RTSP/HTTP) or camera index.
+            stall_timeout (float): Seconds without a new frame (or inside one read()) before reconnecting.
+            backoff_initial (float): First reconnect delay in seconds.
+            backoff_max (float): Upper bound for the reconnect delay in seconds.
+            live (bool or None): Stream (reconnect on failure) or file (stop at the end); None
+                                 treats existing file paths as files and everything else as live.
+            max_abandoned_readers (int): Blocked reader threads tolerated before the watchdog waits.
+        """
+        self.source = source
+        self.stall_timeout = stall_timeout
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.live = live if live is not None else not (isinstance(source, str) and os.path.isfile(source))
+        self.max_abandoned_readers = max_abandoned_readers
+
+        self.cap = None
+        self.frame = None
+        self.frame_time = 0.0        # time.monotonic() when the frame was decoded
+        self.frame_wall_time = 0.0   # time.time() when the frame was decoded
+        self.frame_seq = 0           # Sequence number of the newest frame
+        self.read_seq = 0            # Sequence number of the last frame handed out
+        self.dropped_frames = 0      # Frames overwritten before anyone read them
+        self.reconnects = 0
+        self.reconnecting = False    # True from a detected stall until the next frame arrives
+        self.ended = False           # True once a video file has been read to its end
+
+        self.condition = threading.Condition()
+        self.running = False
+        self.thread = None
+        self.watchdog = None
+        self.generation = 0          # Incremented for every reader thread; older readers exit
+        self.read_started = None     # time.monotonic() when the current reader entered read()
+        self.abandoned = []          # Reader threads left blocked in read() by the watchdog
+
+        self.cap = self.open_capture()
+        if not self.cap.isOpened():
+            self.cap.release()
+            raise ValueError(f"Unable to connect to stream: {source}")
+        self.start()
+
+    def open_capture(self):
+        """
+        Open a new cv2.VideoCapture on the source.
+        """
+        cap = cv2.VideoCapture(self.source)
+        # Keep OpenCV's own queue as short as the backend allows
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        return cap
+
+    def start(self):
+        """
+        Start the background decode thread and the watchdog.
+        """
+        self.running = True
+        self.start_reader(self.cap)
+        self.watchdog = threading.Thread(target=self.watch, daemon=True)
+        self.watchdog.start()
+
+    def start_reader(self, cap):
+        """
+        Hand `cap` to a new reader thread, retiring the current one.
+        """
+        with self.condition:
+            self.generation += 1
+            self.read_started = None
+            self.cap = cap
+            self.thread = threading.Thread(target=self.update, args=(self.generation, cap), daemon=True)
+        self.thread.start()
+
+    def watch(self):
+        """
+        Watchdog loop: restart the reader when cap.read() has been blocked for stall_timeout.
+        """
+        backoff = self.backoff_initial
+        seen_seq = self.frame_seq
+        while self.running:
+            time.sleep(0.1)
+            with self.condition:
+                started = self.read_started
+                if self.frame_seq != seen_seq:
+                    seen_seq = self.frame_seq
+                    backoff = self.backoff_initial
+            if started is None or time.monotonic() - started < self.stall_timeout or not self.running:
+                continue
+            self.abandoned = [thread for thread in self.abandoned if thread.is_alive()]
+            with self.condition:
+                self.reconnecting = True
+            if len(self.abandoned) >= self.max_abandoned_readers:
+                continue  # Wait for a blocked reader to return before giving up on another one
+            print(f"Stream read blocked for {self.stall_timeout:.1f}s, reconnecting to {self.source} in {backoff:.1f}s")
+            time.sleep(backoff)
+            with self.condition:
+                if not self.running or self.read_started != started:
+                    continue  # Stopped, or the read returned meanwhile
+                self.abandoned.append(self.thread)
+            self.reconnects += 1
+            self.start_reader(self.open_capture())
+            backoff = min(backoff * 2, self.backoff_max)
+
+    def update(self, generation, cap):
+        """
+        Reader loop: decode frames, publish the newest one and reconnect on stalls.
+
+        Args:
+            generation (int): Reader generation; the loop ends once a newer reader took over.
+            cap (cv2.VideoCapture): Capture owned by this reader, released when it exits.
+        """
+        backoff = self.backoff_initial
+        last_frame_time = time.monotonic()
+
+        while self.running:
+            with self.condition:
+                if generation != self.generation:
+                    break
+                self.read_started = time.monotonic()
+            ret, frame = cap.read() if cap.isOpened() else (False, None)
+            now = time.monotonic()
+
+            with self.condition:
+                if generation != self.generation:
+                    break  # The watchdog gave up on this read and started a new reader
+                self.read_started = None
+                if ret:
+                    self.reconnecting = False
+                    if self.frame_seq > self.read_seq:
+                        self.dropped_frames += 1
+                    self.frame = frame
+                    self.frame_time = now
+                    self.frame_wall_time = time.time()
+                    self.frame_seq += 1
+                    self.condition.notify_all()
+            if ret:
+                backoff = self.backoff_initial
+                last_frame_time = now
+                continue
+
+            if not self.live:
+                print(f"End of video file {self.source}")
+                with self.condition:
+                    self.ended = True
+                    self.running = False
+                    self.condition.notify_all()
+                break
+
+            if now - last_frame_time < self.stall_timeout:
+                time.sleep(0.01)
+                continue
+
+            # Stream stalled: reconnect with exponential backoff
+            with self.condition:
+                self.reconnecting = True
+            print(f"Stream stalled, reconnecting to {self.source} in {backoff:.1f}s")
+            time.sleep(backoff)
+            if not self.running:
+                break
+            cap.release()
+            cap = self.open_capture()
+            with self.condition:
+                if generation == self.generation:
+                    self.cap = cap
+            self.reconnects += 1
+            backoff = min(backoff * 2, self.backoff_max)
+            last_frame_time = time.monotonic()
+        cap.release()
+
+    def read_latest(self, timeout=None):
+        """
+        Wait for a frame newer than the last one read and return it with its metadata.
+
+        Args:
+            timeout (float or None): Seconds to wait for a new frame, None waits forever.
+
+        Returns:
+            tuple: (ret, frame, capture_time, seq)
+                   - ret: False if no new frame arrived before the timeout or the grabber stopped.
+                   - frame: The newest decoded frame.
+                   - capture_time: time.monotonic() value when the frame was decoded.
+                   - seq: Sequence number of the frame.
+        """
+        with self.condition:
+            has_new = self.condition.wait_for(
+                lambda: self.frame_seq > self.read_seq or not self.running, timeout)
+            if not has_new or self.frame_seq <= self.read_seq:
+                return False, None, None, self.read_seq
+            self.read_seq = self.frame_seq
+            return True, self.frame, self.frame_time, self.frame_seq
+
+    def read(self):
+        """
+        cv2.VideoCapture compatible read() returning the newest frame.
+
+        Keeps waiting while the grabber is reconnecting, so only a stream that stays silent
+        without a reconnect in progress (or a stopped grabber) returns False.
+
+        Returns:
+            tuple: (ret, frame)
+        """
+        while True:
+            ret, frame, _, _ = self.read_latest(timeout=self.stall_timeout + self.backoff_max)
+            if ret or not (self.running and self.reconnecting):
+                return ret, frame
+
+    def isOpened(self):
+        return self.running
+
+    def get(self, prop_id):
+        return self.cap.get(prop_id)
+
+    def stats(self):
+        """
+        Return grabber counters.
+
+        Returns:
+            dict: Frame, drop and reconnect counters plus the age of the newest frame.
+        """
+        with self.condition:
+            age = time.monotonic() - self.frame_time if self.frame_seq else None
+            return {
+                "frames": self.frame_seq,
+                "dropped_frames": self.dropped_frames,
+                "reconnects": self.reconnects,
+                "reconnecting": self.reconnecting,
+                "abandoned_readers": sum(thread.is_alive() for thread in self.abandoned),
+                "frame_age": age,
+            }
+
+    def release(self):
+        """
+        Stop the background threads; each reader releases its capture once it has exited read().
+        """
+        self.running = False
+        with self.condition:
+            self.condition.notify_all()
+        if self.watchdog is not None:
+            self.watchdog.join(timeout=1.0)
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
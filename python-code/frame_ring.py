@@ -0,0 +1,147 @@
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+HEADER_FIELDS = 8  # latest_seq, slots, height, width, channels, closed, fps (mHz), reserved
+
+
+class SharedFrameRing:
+    def __init__(self, name=None, slots=8, shape=(480, 640, 3), create=True, track=False):
+        """
+        Ring buffer of uint8 frames in one multiprocessing.shared_memory block.
+
+        One process writes, any number of processes read frames in place without copying.
+        Every slot carries the sequence number and time.monotonic() capture time of its
+        frame. The writer clears a slot's sequence number while overwriting it, so a reader
+        can check valid(seq) after using a frame to detect that it was overwritten meanwhile.
+
+        Layout: int64 header[8] | int64 seqs[slots] | float64 times[slots] | uint8 frames[slots, *shape]
+
+        Args:
+            name (str or None): Shared memory name; None picks a free one when creating.
+            slots (int): Number of frames kept.
+            shape (tuple): Frame shape (height, width, channels).
+            create (bool): Create the block, or attach to an existing one by name.
+            track (bool): When attaching, keep the block registered with the resource tracker.
+                          Only for children started by the creating process, which share its
+                          tracker; independent processes must not, or their exit unlinks the block.
+        """
+        if create:
+            slots = int(slots)
+            shape = tuple(int(v) for v in shape)
+            if len(shape) == 2:
+                shape = shape + (1,)
+            size = 8 * HEADER_FIELDS + 16 * slots + slots * int(np.prod(shape))
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name) if track else attach_shared_memory(name)
+            header = np.ndarray((HEADER_FIELDS,), dtype=np.int64, buffer=self.shm.buf)
+            slots = int(header[1])
+            shape = tuple(int(v) for v in header[2:5])
+
+        self.name = self.shm.name
+        self.slots = slots
+        self.shape = shape
+        self.owner = create
+
+        buf = self.shm.buf
+        offset = 8 * HEADER_FIELDS
+        self.header = np.ndarray((HEADER_FIELDS,), dtype=np.int64, buffer=buf)
+        self.seqs = np.ndarray((slots,), dtype=np.int64, buffer=buf, offset=offset)
+        offset += 8 * slots
+        self.times = np.ndarray((slots,), dtype=np.float64, buffer=buf, offset=offset)
+        offset += 8 * slots
+        self.frames = np.ndarray((slots,) + shape, dtype=np.uint8, buffer=buf, offset=offset)
+
+        if create:
+            self.header[:] = 0
+            self.header[0] = -1
+            self.header[1] = slots
+            self.header[2:5] = shape
+            self.seqs[:] = -1
+
+    def latest(self):
+        """
+        Sequence number of the newest complete frame, -1 before the first write.
+        """
+        return int(self.header[0])
+
+    def mark_closed(self):
+        """
+        Tell readers that the writer has stopped for good.
+        """
+        self.header[5] = 1
+
+    def closed(self):
+        return bool(self.header[5])
+
+    @property
+    def fps(self):
+        """
+        Source frame rate announced by the writer, 0.0 when unknown.
+        """
+        return self.header[6] / 1000.0
+
+    @fps.setter
+    def fps(self, value):
+        self.header[6] = int(round(value * 1000))
+
+    def write(self, frame, capture_time):
+        """
+        Copy a frame into the next slot. Only one process may write.
+
+        Returns:
+            int: Sequence number of the frame.
+        """
+        seq = self.latest() + 1
+        slot = seq % self.slots
+        self.seqs[slot] = -1
+        self.frames[slot] = frame.reshape(self.shape)
+        self.times[slot] = capture_time
+        self.seqs[slot] = seq
+        self.header[0] = seq
+        return seq
+
+    def read(self, seq):
+        """
+        Return a zero-copy view of a frame, or None when it has been overwritten.
+
+        Returns:
+            tuple or None: (frame, capture_time)
+        """
+        slot = seq % self.slots
+        if seq < 0 or self.seqs[slot] != seq:
+            return None
+        frame = self.frames[slot]
+        if self.shape[2] == 1:
+            frame = frame[:, :, 0]
+        return frame, float(self.times[slot])
+
+    def valid(self, seq):
+        """
+        True while the frame with this sequence number is still in the ring unchanged.
+        """
+        return seq >= 0 and self.seqs[seq % self.slots] == seq
+
+    def close(self):
+        # Views must go before the buffer can be released
+        del self.header, self.seqs, self.times, self.frames
+        try:
+            self.shm.close()
+        except BufferError:
+            pass  # Frames handed out are still referenced; the mapping goes away with them
+        if self.owner:
+            self.shm.unlink()
+
+
+def attach_shared_memory(name):
+    """
+    Attach to an existing shared memory block without letting this process unlink it on exit.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 always registers the block with this process's resource tracker
+        shm = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
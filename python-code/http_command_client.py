@@ -0,0 +1,173 @@
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from pipeline_metrics import LatencyHistogram
+
+
+class HttpCommandClient:
+    def __init__(self, url, rate=10, timeout=0.3, max_in_flight=1):
+        """
+        Rate-scheduled HTTP actuation client for the ESP32 web-api sketch.
+
+        One keep-alive session and one scheduler thread send the newest command to
+        /setSpeed at a fixed rate. Older commands are overwritten, never queued, and at
+        most `max_in_flight` requests are outstanding; ticks that find them all busy are
+        skipped instead of piling up threads.
+
+        Args:
+            url (str): setSpeed endpoint, e.g. "http://192.168.115.24/setSpeed".
+            rate (float): Send rate in Hz.
+            timeout (float): Per-request timeout in seconds.
+            max_in_flight (int): Maximum concurrent requests.
+        """
+        self.url = url
+        self.interval = 1.0 / rate
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_in_flight)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.executor = ThreadPoolExecutor(max_workers=max_in_flight)
+        self.slots = threading.BoundedSemaphore(max_in_flight)
+
+        self.lock = threading.Lock()
+        self.latest = None            # Newest (right, left)
+        self.latency = LatencyHistogram()
+        self.sent = 0
+        self.failed = 0
+        self.skipped_ticks = 0
+
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def submit(self, right_speed, left_speed):
+        """
+        Replace the command sent on the next tick.
+        """
+        with self.lock:
+            self.latest = (int(right_speed), int(left_speed))
+
+    def send(self, command):
+        """
+        Send one command and record its latency. Runs on the executor.
+        """
+        right_speed, left_speed = command
+        start = time.perf_counter()
+        try:
+            # The sketch answers with a 303 to "/"; following it would fetch the whole page
+            response = self.session.get(self.url, params={'RightSpeed': right_speed, 'LeftSpeed': left_speed},
+                                        timeout=self.timeout, allow_redirects=False)
+            with self.lock:
+                if response.status_code in (200, 303):
+                    self.sent += 1
+                    self.latency.add(time.perf_counter() - start)
+                else:
+                    self.failed += 1
+            if response.status_code not in (200, 303):
+                print(f"Failed to send data: {response.status_code}")
+        except requests.RequestException as e:
+            with self.lock:
+                self.failed += 1
+            print(f"Error sending data: {e}")
+        finally:
+            self.slots.release()
+
+    def run(self):
+        """
+        Scheduler loop sending the newest command at a fixed rate.
+        """
+        next_tick = time.monotonic()
+        while self.running:
+            with self.lock:
+                command = self.latest
+            if command is not None:
+                if self.slots.acquire(blocking=False):
+                    self.executor.submit(self.send, command)
+                else:
+                    self.skipped_ticks += 1
+
+            next_tick += self.interval
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_tick = time.monotonic()  # Fell behind, do not burst to catch up
+
+    def stats(self):
+        with self.lock:
+            return {
+                "sent": self.sent,
+                "failed": self.failed,
+                "skipped_ticks": self.skipped_ticks,
+                "latency": self.latency.summary(),
+            }
+
+    def stop(self):
+        self.running = False
+        self.thread.join(timeout=1.0)
+        self.executor.shutdown(wait=True)
+        self.session.close()
+
+
+def serve_stand_in(port=0):
+    """
+    Start a local stand-in for the ESP32 /setSpeed endpoint.
+
+    Returns:
+        tuple: (server, received) where received is a list of (RightSpeed, LeftSpeed) tuples.
+    """
+    received = []
+
+    class SetSpeedHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # Keep-alive, like the ESP32 WebServer
+
+        def do_GET(self):
+            request = urlparse(self.path)
+            if request.path == "/setSpeed":
+                params = parse_qs(request.query)
+                received.append((int(params["RightSpeed"][0]), int(params["LeftSpeed"][0])))
+                self.send_response(303)
+                self.send_header("Location", "/")
+            else:
+                self.send_response(200)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), SetSpeedHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, received
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the HTTP command client against a local stand-in server.")
+    parser.add_argument("--rate", type=float, default=20, help="Send rate in Hz.")
+    parser.add_argument("--duration", type=float, default=2.0, help="Seconds to run.")
+    args = parser.parse_args()
+
+    server, received = serve_stand_in()
+    client = HttpCommandClient(f"http://127.0.0.1:{server.server_port}/setSpeed", rate=args.rate)
+    end = time.monotonic() + args.duration
+    while time.monotonic() < end:
+        client.submit(40, 40)
+        time.sleep(0.005)
+    client.stop()
+    server.shutdown()
+
+    print(f"Stand-in received {len(received)} commands")
+    print(client.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+import traceback
+
+import cv2
+import numpy as np
+
+from frame_bus import open_source
+from frame_ring import SharedFrameRing
+from mask_utils import union_masks, mask_for_frame
+from roi_midpoints import calculate_roi_midpoints, scale_midpoints
+
+
+class InferenceResult:
+    def __init__(self, seq, capture_time, midpoints, mask, inference_time, worker):
+        self.seq = seq
+        self.capture_time = capture_time    # time.monotonic() capture time of the frame
+        self.midpoints = midpoints          # Frame coordinates, as calculate_roi_midpoints
+        self.mask = mask                    # Binary mask, only when the pool returns masks
+        self.inference_time = inference_time
+        self.worker = worker
+
+
+def load_worker_model(model, backend, imgsz, threads):
+    if isinstance(model, str):
+        from segmentation_backend import load_backend
+        return load_backend(model, backend, imgsz=imgsz, threads=threads)
+    return model()  # Picklable factory, e.g. functools.partial(StubSegmentationModel, latency=0.03)
+
+
+def claim_newest(ring, claimed, condition, stop_event):
+    """
+    Wait for a frame no worker has claimed yet and claim the newest one.
+
+    Returns:
+        int or None: Sequence number of the claimed frame, None when stopping.
+    """
+    with condition:
+        while not stop_event.is_set():
+            seq = ring.latest()
+            if seq > claimed.value:
+                claimed.value = seq
+                return seq
+            condition.wait(0.1)
+    return None
+
+
+def worker_main(worker, ring_name, model, backend, imgsz, threads, active_rois, input_mask_resolution,
+                return_masks, claimed, condition, results, stop_event, ready):
+    """
+    Inference worker process: claim the newest frame, segment it in place and return midpoints.
+    """
+    ring = SharedFrameRing(ring_name, create=False, track=True)
+    try:
+        model = load_worker_model(model, backend, imgsz, threads)
+    except Exception:
+        # Report instead of dying silently, the pool is waiting for every worker to be ready
+        results.put(("error", worker, traceback.format_exc()))
+        ring.close()
+        return
+    ready.release()
+    frame = result = None
+    try:
+        while True:
+            seq = claim_newest(ring, claimed, condition, stop_event)
+            if seq is None:
+                break
+            entry = ring.read(seq)
+            if entry is None:
+                continue
+            frame, capture_time = entry
+
+            start = time.perf_counter()
+            result = model(frame)[0]
+            if result.masks is not None:
+                mask, scale = mask_for_frame(union_masks(result.masks.data), frame.shape, input_mask_resolution)
+            else:
+                mask, scale = np.zeros(frame.shape[:2], dtype=np.uint8), (1.0, 1.0)
+            midpoints = scale_midpoints(calculate_roi_midpoints(mask, active_rois), scale)
+            elapsed = time.perf_counter() - start
+
+            # The model may have read a frame the writer replaced meanwhile
+            if not ring.valid(seq):
+                results.put(("torn", seq))
+                continue
+            results.put(InferenceResult(seq, capture_time, midpoints, mask if return_masks else None,
+                                        elapsed, worker))
+    finally:
+        frame = result = None
+        ring.close()
+
+
+def capture_main(source, ring_name, condition, stop_event, ended):
+    """
+    Capture process: decode the stream and write every frame into the ring.
+    """
+    ring = SharedFrameRing(ring_name, create=False, track=True)
+    cap = open_source(source, fallback=cv2.VideoCapture)
+    height, width = ring.shape[:2]
+    try:
+        while not stop_event.is_set():
+            ret, frame = cap.read()
+            if not ret:
+                break
+            capture_time = time.monotonic()
+            if frame.shape[:2] != (height, width):
+                frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_LINEAR)
+            ring.write(frame, capture_time)
+            with condition:
+                condition.notify_all()
+    finally:
+        ended.set()
+        cap.release()
+        ring.close()
+
+
+class InferenceWorkerPool:
+    def __init__(self, model, active_rois, workers=2, frame_shape=(480, 640, 3), slots=None,
+                 backend="torch", imgsz=640, threads=None, input_mask_resolution=False, return_masks=False,
+                 startup_timeout=120.0, max_restarts=3):
+        """
+        Segmentation on several processes sharing one frame ring.
+
+        Frames go into a multiprocessing.shared_memory ring (from submit() or a capture
+        process). Each worker process holds its own model, claims the newest frame nobody
+        has claimed yet, reads it in place and returns the ROI midpoints with the frame's
+        sequence number. Post-processing runs in the workers too, so it scales with cores
+        instead of contending for one GIL. latest() hands the controller the newest
+        completed result and never one older than the last it returned. A worker that dies
+        while running is respawned, up to `max_restarts` times; after that latest() raises.
+
+        Args:
+            model (str or callable): Model path loaded with load_backend in every worker, or a
+                                     picklable factory returning a model.
+            active_rois (list of int): ROI indices counted from the top.
+            workers (int): Number of inference processes.
+            frame_shape (tuple): Shape of the frames in the ring; captured frames are resized to it.
+            slots (int or None): Ring size, default leaves every worker a frame plus headroom.
+            backend (str): Inference backend, see segmentation_backend.
+            imgsz (int): Model input size.
+            threads (int or None): CPU threads per worker, default splits the cores evenly.
+            input_mask_resolution (bool): Analyse ROIs on the mask at model input size and scale the midpoints.
+            return_masks (bool): Send the binary masks back as well (for display).
+            startup_timeout (float): Seconds all workers get to load their model.
+            max_restarts (int): Workers respawned after dying at runtime before the pool gives up.
+
+        Raises:
+            RuntimeError: A worker failed to load its model or exited, or startup timed out.
+        """
+        self.context = mp.get_context("spawn")  # Models and CUDA do not survive fork
+        self.workers = workers
+        self.ring = SharedFrameRing(slots=slots or 2 * workers + 4, shape=frame_shape)
+        self.condition = self.context.Condition()
+        self.claimed = self.context.Value("q", -1, lock=False)  # Guarded by self.condition
+        self.results = self.context.Queue()
+        self.stop_event = self.context.Event()
+        self.capture_ended = self.context.Event()
+        self.capture_process = None
+        if threads is None:
+            threads = max(1, (os.cpu_count() or 1) // workers)
+
+        self.worker_args = (self.ring.name, model, backend, imgsz, threads, list(active_rois),
+                            input_mask_resolution, return_masks, self.claimed, self.condition,
+                            self.results, self.stop_event)
+        self.max_restarts = max_restarts
+        self.restarts = 0
+        self.error = None           # Set once dead workers can no longer be replaced
+
+        self.ready = self.context.Semaphore(0)  # Kept for respawned workers, which release it too
+        self.processes = [self.spawn_worker(i) for i in range(workers)]
+        self.wait_ready(self.ready, startup_timeout)
+
+        self.lock = threading.Condition()
+        self.newest = None          # Newest completed result
+        self.consumed_seq = -1      # Sequence number of the last result handed out
+        self.completed = 0
+        self.out_of_order = 0
+        self.torn = 0
+        self.running = True
+        self.collector = threading.Thread(target=self.collect, daemon=True)
+        self.collector.start()
+
+    def spawn_worker(self, worker):
+        process = self.context.Process(target=worker_main, daemon=True, name=f"inference-{worker}",
+                                       args=(worker,) + self.worker_args + (self.ready,))
+        process.start()
+        return process
+
+    def check_workers(self):
+        """
+        Respawn workers that died at runtime; the frame a dead worker claimed is never answered.
+        """
+        for i, process in enumerate(self.processes):
+            if process.exitcode is None or self.stop_event.is_set() or self.error is not None:
+                continue
+            if self.restarts >= self.max_restarts:
+                with self.lock:
+                    self.error = f"Inference worker {process.name} exited with code {process.exitcode}, " \
+                                 f"{self.restarts} restarts used up"
+                    self.lock.notify_all()
+                return
+            print(f"Inference worker {process.name} exited with code {process.exitcode}, restarting it")
+            self.restarts += 1
+            self.processes[i] = self.spawn_worker(i)
+
+    def wait_ready(self, ready, timeout):
+        """
+        Wait until every worker loaded its model; on a failure stop the others and raise.
+        """
+        deadline = time.monotonic() + timeout
+        started = 0
+        while started < len(self.processes):
+            if ready.acquire(timeout=0.1):
+                started += 1
+                continue
+            error = None
+            try:
+                item = self.results.get_nowait()
+                if item[0] == "error":
+                    error = f"Inference worker {item[1]} failed to start:\n{item[2]}"
+            except queue.Empty:
+                pass
+            if error is None:
+                dead = [process for process in self.processes if process.exitcode is not None]
+                if dead:
+                    error = f"Inference worker {dead[0].name} exited with code {dead[0].exitcode} during startup"
+                elif time.monotonic() > deadline:
+                    error = f"Inference workers not ready after {timeout} s"
+            if error is not None:
+                self.stop_event.set()
+                for process in self.processes:
+                    process.terminate()
+                    process.join(timeout=2.0)
+                self.ring.close()
+                raise RuntimeError(error)
+
+    def start_capture(self, source):
+        """
+        Decode `source` in a separate capture process writing straight into the ring.
+        """
+        self.capture_process = self.context.Process(target=capture_main, daemon=True, name="capture",
+                                                    args=(source, self.ring.name, self.condition,
+                                                          self.stop_event, self.capture_ended))
+        self.capture_process.start()
+
+    def capture_alive(self):
+        return self.capture_process is not None and not self.capture_ended.is_set()
+
+    def submit(self, frame, capture_time=None):
+        """
+        Write a frame into the ring and wake the workers.
+
+        Returns:
+            int: Sequence number of the frame.
+        """
+        height, width = self.ring.shape[:2]
+        if frame.shape[:2] != (height, width):
+            frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_LINEAR)
+        seq = self.ring.write(frame, time.monotonic() if capture_time is None else capture_time)
+        with self.condition:
+            self.condition.notify_all()
+        return seq
+
+    def frame(self, seq, copy=False):
+        """
+        Frame still in the ring, e.g. the one a result belongs to.
+
+        Args:
+            seq (int): Sequence number of the frame.
+            copy (bool): Return a private copy, checked after copying to still be frame `seq`.
+                         Without it the zero-copy view may be overwritten while it is used.
+
+        Returns:
+            numpy.ndarray or None: None when the frame was (or while copying got) overwritten.
+        """
+        entry = self.ring.read(seq)
+        if entry is None:
+            return None
+        if not copy:
+            return entry[0]
+        frame = entry[0].copy()
+        return frame if self.ring.valid(seq) else None
+
+    def collect(self):
+        while self.running:
+            self.check_workers()
+            try:
+                item = self.results.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                break
+            if isinstance(item, tuple) and item[0] == "error":
+                print(f"Inference worker {item[1]} failed to start:\n{item[2]}")
+                continue
+            with self.lock:
+                if isinstance(item, tuple):
+                    if item[0] == "torn":
+                        self.torn += 1
+                    continue
+                self.completed += 1
+                if self.newest is not None and item.seq < self.newest.seq:
+                    self.out_of_order += 1  # A slower worker finished an older frame
+                    continue
+                self.newest = item
+                self.lock.notify_all()
+
+    def latest(self, timeout=None):
+        """
+        Return the newest completed result newer than the last one returned.
+
+        Args:
+            timeout (float or None): Seconds to wait for one, 0 only checks.
+
+        Returns:
+            InferenceResult or None
+
+        Raises:
+            RuntimeError: Workers kept dying and could not be replaced.
+        """
+        with self.lock:
+            ready = lambda: self.newest is not None and self.newest.seq > self.consumed_seq
+            if timeout != 0:
+                self.lock.wait_for(lambda: ready() or self.error is not None, timeout)
+            if self.error is not None:
+                raise RuntimeError(self.error)
+            if not ready():
+                return None
+            self.consumed_seq = self.newest.seq
+            return self.newest
+
+    def stats(self):
+        with self.lock:
+            return {
+                "workers": self.workers,
+                "submitted": self.ring.latest() + 1,
+                "completed": self.completed,
+                "out_of_order": self.out_of_order,
+                "torn": self.torn,
+                "restarts": self.restarts,
+            }
+
+    def stop(self):
+        self.stop_event.set()
+        with self.condition:
+            self.condition.notify_all()
+        if self.capture_process is not None:
+            self.capture_process.join(timeout=2.0)
+        for process in self.processes:
+            process.join(timeout=2.0)
+            if process.is_alive():
+                process.terminate()
+        self.running = False
+        self.collector.join(timeout=1.0)
+        self.ring.close()
@@ -1,10 +1,15 @@
+import time
+
 import cv2
-import numpy as np
+
+from line_detector import SectionLineDetector
 
 class LineFollowerRobot:
-    def __init__(self, rtsp_url, total_sections=10, active_sections=None):
+    def __init__(self, rtsp_url, total_sections=10, active_sections=None, show_windows=True, verbose=False):
         # RTSP URL
         self.rtsp_url = rtsp_url
+        self.show_windows = show_windows
+        self.verbose = verbose  # Cetak error dan waktu deteksi setiap frame
 
         # Frame parameters
         self.frame_width = 640
@@ -19,53 +24,24 @@ class LineFollowerRobot:
         else:
             self.active_sections = active_sections
 
-        # Rentang warna hitam dalam HSV
-        self.lower_black = np.array([0, 0, 0])     # Rentang bawah warna hitam
-        self.upper_black = np.array([180, 255, 50])  # Rentang atas warna hitam
-
-    def draw_sections(self, frame):
-        """Draw active sections on the frame with blue rectangles."""
-        for section in self.active_sections:
-            # Bagian dihitung dari bawah (1 = bagian paling bawah)
-            y_start = self.frame_height - (section * self.section_height)
-            y_end = y_start + self.section_height
-
-            # Gambar kotak dengan garis biru
-            cv2.rectangle(frame, (0, y_start), (self.frame_width, y_end), (255, 0, 0), 2)
+        # Deteksi garis hitam (HSV: V <= 50) hanya pada baris bagian aktif
+        self.detector = SectionLineDetector(self.frame_width, self.frame_height, total_sections,
+                                            self.active_sections, lower=(0, 0, 0), upper=(180, 255, 50))
 
-        return frame
+    def draw_sections(self, frame, midpoints=None, mask=None):
+        """Draw active sections, detected line pixels and section centroids on the frame."""
+        return self.detector.draw(frame, midpoints or {}, mask)
 
     def process_active_sections(self, frame):
-        """Process only the active sections for black color detection using HSV."""
-        mask = np.ones(frame.shape[:2], dtype="uint8") * 255  # Mask untuk bagian luar aktif
-        overlay = frame.copy()  # Salinan frame untuk overlay
-
-        # Konversi frame ke HSV
-        hsv_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-
-        for section in self.active_sections:
-            # Bagian dihitung dari bawah (1 = bagian paling bawah)
-            y_start = self.frame_height - (section * self.section_height)
-            y_end = y_start + self.section_height
-
-            # Region of Interest (ROI) untuk bagian aktif
-            roi = hsv_frame[y_start:y_end, :]
+        """
+        Detect the black line in the active sections.
 
-            # Mask untuk mendeteksi warna hitam
-            black_mask = cv2.inRange(roi, self.lower_black, self.upper_black)
-
-            # Tambahkan overlay warna hijau untuk area hitam yang terdeteksi
-            overlay[y_start:y_end, :] = cv2.addWeighted(overlay[y_start:y_end, :], 0.7, 
-                                                        np.dstack([black_mask] * 3), 0.3, 0)
-
-            # Area aktif tetap pada frame utama, sisanya dibuat putih
-            mask[y_start:y_end, :] = 0
-
-        # Bagian di luar area aktif diubah menjadi putih
-        frame[np.where(mask == 255)] = [255, 255, 255]
-
-        # Kembali frame dengan overlay
-        return frame
+        Returns:
+            tuple: (error, midpoints, mask) where error is the centroid x of the bottom-most
+                   section that sees the line minus the frame centre, in pixels, ready for
+                   calculate_pid_correction; None when the line is lost.
+        """
+        return self.detector.detect(frame)
 
     def run(self):
         """Main loop for the robot."""
@@ -81,20 +57,24 @@ class LineFollowerRobot:
                 break
 
             # Resize frame untuk memastikan ukuran konsisten
-            frame = cv2.resize(frame, (self.frame_width, self.frame_height), interpolation=cv2.INTER_LINEAR)
-
-            # Frame Original dengan Kotak Biru
-            original_frame = self.draw_sections(frame.copy())
+            if frame.shape[1] != self.frame_width or frame.shape[0] != self.frame_height:
+                frame = cv2.resize(frame, (self.frame_width, self.frame_height), interpolation=cv2.INTER_LINEAR)
 
-            # Frame dengan Bagian Luar Putih dan Deteksi Warna Hitam
-            processed_frame = self.process_active_sections(frame.copy())
+            start = time.perf_counter()
+            error, midpoints, mask = self.process_active_sections(frame)
+            elapsed_ms = (time.perf_counter() - start) * 1000
 
-            # Tampilkan hasil deteksi
-            cv2.imshow("Original Frame with Active Sections", original_frame)
-            cv2.imshow("Processed Frame with Black Detection (HSV)", processed_frame)
+            if self.verbose:
+                if error is None:
+                    print(f"Line lost | {elapsed_ms:.2f} ms")
+                else:
+                    print(f"Error: {error:.2f} | {elapsed_ms:.2f} ms")
 
-            if cv2.waitKey(1) & 0xFF == ord('q'):  # Tekan 'q' untuk keluar
-                break
+            if self.show_windows:
+                # Gambar langsung pada frame, tanpa salinan
+                cv2.imshow("Line Detection in Active Sections", self.draw_sections(frame, midpoints, mask))
+                if cv2.waitKey(1) & 0xFF == ord('q'):  # Tekan 'q' untuk keluar
+                    break
 
         cap.release()
         cv2.destroyAllWindows()
@@ -108,4 +88,4 @@ if __name__ == "__main__":
     active_sections = [2, 7]  # Bagian aktif: 2 dan 7
 
     robot = LineFollowerRobot(rtsp_url, total_sections=total_sections, active_sections=active_sections)
-    robot.run()
\ No newline at end of file
+    robot.run()
@@ -0,0 +1,127 @@
+import cv2
+import numpy as np
+
+
+class SectionLineDetector:
+    def __init__(self, frame_width=640, frame_height=480, total_sections=10, active_sections=None,
+                 lower=(0, 0, 0), upper=(180, 255, 50), min_pixels=20):
+        """
+        Classical-CV line detector working only on the rows of the active sections.
+
+        Only the active-section rows are converted to HSV and thresholded. Per-section line
+        centroids then come from column sums of the mask (image moments m00 and m10) in one
+        vectorized pass, without copying or blending the frame.
+
+        Args:
+            frame_width, frame_height (int): Frame size the section geometry is built for.
+            total_sections (int): Number of horizontal sections in the frame.
+            active_sections (list of int): Sections to use, counted from the bottom (1 = bottom).
+            lower, upper (tuple): HSV range of the line colour, black by default.
+            min_pixels (int): Minimum line pixels for a section centroid to be valid.
+        """
+        self.total_sections = total_sections
+        self.active_sections = list(active_sections) if active_sections is not None \
+            else list(range(1, total_sections + 1))
+        self.lower = np.array(lower, dtype=np.uint8)
+        self.upper = np.array(upper, dtype=np.uint8)
+        self.min_pixels = min_pixels
+        self.resize(frame_width, frame_height)
+
+    def resize(self, frame_width, frame_height):
+        """
+        Rebuild the section geometry for a new frame size.
+        """
+        self.frame_width = frame_width
+        self.frame_height = frame_height
+        self.frame_center_x = frame_width / 2
+        self.section_height = frame_height // self.total_sections
+
+        # Section 1 is at the bottom of the frame
+        starts = np.array([frame_height - section * self.section_height for section in self.active_sections],
+                          dtype=np.intp)
+        self.section_starts = starts
+        self.rows = (starts[:, None] + np.arange(self.section_height, dtype=np.intp)[None, :]).ravel()
+        self.centers_y = starts + self.section_height // 2
+        self.columns = np.arange(frame_width, dtype=np.float64)
+
+    def section_mask(self, frame):
+        """
+        Threshold the active-section rows of a BGR frame.
+
+        Returns:
+            numpy.ndarray: (num_active * section_height, width) uint8 mask, 255 on the line.
+        """
+        if frame.shape[1] != self.frame_width or frame.shape[0] != self.frame_height:
+            self.resize(frame.shape[1], frame.shape[0])
+        # The active rows, stacked, form a small image so cvtColor only touches those pixels
+        rows = frame[self.rows]
+        hsv = cv2.cvtColor(rows, cv2.COLOR_BGR2HSV)
+        return cv2.inRange(hsv, self.lower, self.upper)
+
+    def centroids(self, mask):
+        """
+        Compute the line centroid of every active section from its mask rows.
+
+        Args:
+            mask (numpy.ndarray): Output of section_mask().
+
+        Returns:
+            dict: Section -> (x, y) centroid in frame coordinates, or None when the section
+                  has fewer than min_pixels line pixels.
+        """
+        # Column sums per section: (num_active, width)
+        counts = (mask.reshape(len(self.active_sections), self.section_height, -1) > 0).sum(axis=1)
+        m00 = counts.sum(axis=1)
+        m10 = counts @ self.columns
+
+        midpoints = {}
+        for i, section in enumerate(self.active_sections):
+            if m00[i] >= self.min_pixels:
+                midpoints[section] = (int(m10[i] / m00[i]), int(self.centers_y[i]))
+            else:
+                midpoints[section] = None
+        return midpoints
+
+    def steering_error(self, midpoints):
+        """
+        Horizontal error of the bottom-most detected section, as used by calculate_pid_correction.
+
+        Returns:
+            float or None: Centroid x minus the frame centre in pixels (positive = line to the right),
+                           None when no section sees the line.
+        """
+        for section in sorted(midpoints):
+            if midpoints[section] is not None:
+                return midpoints[section][0] - self.frame_center_x
+        return None
+
+    def detect(self, frame):
+        """
+        Run the detector on one frame.
+
+        Returns:
+            tuple: (error, midpoints, mask)
+                   - error: Steering error in pixels, or None when the line is lost.
+                   - midpoints: Section -> (x, y) centroid or None.
+                   - mask: Active-section rows mask from section_mask().
+        """
+        mask = self.section_mask(frame)
+        midpoints = self.centroids(mask)
+        return self.steering_error(midpoints), midpoints, mask
+
+    def draw(self, frame, midpoints, mask=None):
+        """
+        Draw the active sections, their centroids and the detected line pixels in place.
+        """
+        if mask is not None:
+            # Tint detected line pixels green only on the active rows
+            rows = frame[self.rows]
+            rows[mask > 0] = (0, 255, 0)
+            frame[self.rows] = rows
+        for start in self.section_starts:
+            cv2.rectangle(frame, (0, int(start)), (self.frame_width, int(start) + self.section_height),
+                          (255, 0, 0), 2)
+        for point in midpoints.values():
+            if point is not None:
+                cv2.circle(frame, point, 5, (0, 0, 255), -1)
+        return frame
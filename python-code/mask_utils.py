@@ -0,0 +1,73 @@
+import cv2
+import numpy as np
+
+
+def union_masks(masks_data, threshold=0.5):
+    """
+    Reduce all instance masks to one boolean union with a single host copy.
+
+    Thresholding and the OR over instances run where the masks live (GPU/MPS tensors
+    stay on the device), then the union is copied to the CPU once.
+
+    Args:
+        masks_data (torch.Tensor or numpy.ndarray): Instance masks of shape (N, H, W), e.g. result.masks.data.
+        threshold (float): Probability above which a pixel belongs to a mask.
+
+    Returns:
+        numpy.ndarray: Boolean mask of shape (H, W).
+    """
+    union = (masks_data > threshold).any(0)
+    if hasattr(union, "cpu"):
+        union = union.cpu().numpy()
+    return union
+
+
+def letterbox_region(mask_shape, frame_shape):
+    """
+    Locate the frame content inside a letterboxed model mask.
+
+    Args:
+        mask_shape (tuple): (height, width) of the model mask.
+        frame_shape (tuple): Shape of the original frame.
+
+    Returns:
+        tuple: (top, bottom, left, right, scale_x, scale_y)
+               - top/bottom/left/right: Slice bounds of the un-padded area in the mask.
+               - scale_x/scale_y: Factors mapping mask coordinates in that area to frame coordinates.
+    """
+    mask_h, mask_w = mask_shape[:2]
+    frame_h, frame_w = frame_shape[:2]
+    gain = min(mask_h / frame_h, mask_w / frame_w)
+    # Same padding as ultralytics' LetterBox: an odd remainder puts the extra row/column
+    # at the bottom/right
+    pad_w = (mask_w - int(round(frame_w * gain))) / 2
+    pad_h = (mask_h - int(round(frame_h * gain))) / 2
+    top, bottom = int(round(pad_h - 0.1)), mask_h - int(round(pad_h + 0.1))
+    left, right = int(round(pad_w - 0.1)), mask_w - int(round(pad_w + 0.1))
+    return top, bottom, left, right, frame_w / (right - left), frame_h / (bottom - top)
+
+
+def mask_for_frame(union, frame_shape, input_resolution=False):
+    """
+    Turn a boolean union mask into the 0/255 single-channel mask used for ROI analysis.
+
+    Args:
+        union (numpy.ndarray): Boolean union mask at model input size, as result.masks.data.
+        frame_shape (tuple): Shape of the original frame.
+        input_resolution (bool): Keep the mask at model input size instead of resizing it to the frame.
+
+    Returns:
+        tuple: (binary_mask, scale)
+               - binary_mask: uint8 mask (255 for segmented regions, 0 for background).
+               - scale: (scale_x, scale_y) mapping mask coordinates to frame coordinates.
+    """
+    top, bottom, left, right, scale_x, scale_y = letterbox_region(union.shape, frame_shape)
+    binary_mask = union[top:bottom, left:right].view(np.uint8) * np.uint8(255)
+
+    if input_resolution:
+        return binary_mask, (scale_x, scale_y)
+
+    frame_h, frame_w = frame_shape[:2]
+    if binary_mask.shape != (frame_h, frame_w):
+        binary_mask = cv2.resize(binary_mask, (frame_w, frame_h), interpolation=cv2.INTER_NEAREST)
+    return binary_mask, (1.0, 1.0)
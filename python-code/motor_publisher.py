@@ -0,0 +1,159 @@
+import threading
+import time
+
+import paho.mqtt.client as mqtt
+
+# Topics subscribed by arduino-code/mqtt-api
+MQTT_TOPIC_RIGHT = "MotorKanan"
+MQTT_TOPIC_LEFT = "MotorKiri"
+MQTT_TOPIC_COMBINED = "MotorSpeed"  # Payload "RightSpeed,LeftSpeed"
+
+
+class MotorCommandPublisher:
+    def __init__(self, client, rate=20, heartbeat=0.2, deadband=1, combined=True, qos=0,
+                 min_speed=0, max_speed=255, max_command_age=0.4):
+        """
+        Single long-lived MQTT publisher for motor commands.
+
+        submit() only stores the newest command, so commands never queue up behind a slow
+        broker. A background thread sends at most `rate` times per second, skips values
+        within `deadband` of the last sent command, and resends the last command every
+        `heartbeat` seconds so the ESP32 stays inside its 500 ms MqttTimeout. The heartbeat
+        only repeats a command for `max_command_age` seconds after it was submitted. After
+        that a stop command is sent at the heartbeat rate until a new command arrives: the
+        ESP32 keeps its previous speeds when MQTT goes quiet, so a hung pipeline has to be
+        stopped from here, and a single lost QoS 0 stop must not leave the robot driving.
+
+        Args:
+            client (paho.mqtt.client.Client): Connected client with its network loop running.
+            rate (float): Maximum publish rate in Hz.
+            heartbeat (float): Seconds after which the last command is resent unchanged.
+            deadband (int): Changes up to this many speed units are not sent.
+            combined (bool): Publish both speeds atomically on MotorSpeed instead of two topics.
+            qos (int): MQTT QoS; 0 avoids retransmitting commands that are already stale.
+            min_speed, max_speed (int): Range the speeds are clamped to, as on the ESP32.
+            max_command_age (float): Seconds after submission a command is replaced by stop commands.
+        """
+        self.client = client
+        self.interval = 1.0 / rate
+        self.heartbeat = heartbeat
+        self.deadband = deadband
+        self.combined = combined
+        self.qos = qos
+        self.min_speed = min_speed
+        self.max_speed = max_speed
+        self.max_command_age = max_command_age
+
+        self.latest = None         # Newest submitted (right, left)
+        self.submit_time = 0.0     # time.monotonic() the newest command was submitted
+        self.fresh = False         # True while self.latest has not been considered for sending
+        self.sent = None           # Last published (right, left)
+        self.last_send_time = 0.0
+        self.published = 0
+        self.skipped = 0
+        self.stale = 0
+        self.errors = 0
+
+        self.condition = threading.Condition()
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def clamp(self, speed):
+        return int(max(self.min_speed, min(self.max_speed, round(speed))))
+
+    def submit(self, right_speed, left_speed):
+        """
+        Replace the pending command with the newest PID output.
+        """
+        with self.condition:
+            self.latest = (self.clamp(right_speed), self.clamp(left_speed))
+            self.submit_time = time.monotonic()
+            self.fresh = True
+            self.condition.notify()
+
+    def publish(self, command):
+        """
+        Send a command.
+
+        Returns:
+            bool: True when the client accepted every message.
+        """
+        right_speed, left_speed = command
+        if self.combined:
+            results = [self.client.publish(MQTT_TOPIC_COMBINED, f"{right_speed},{left_speed}", qos=self.qos)]
+        else:
+            results = [self.client.publish(MQTT_TOPIC_RIGHT, right_speed, qos=self.qos),
+                       self.client.publish(MQTT_TOPIC_LEFT, left_speed, qos=self.qos)]
+        if all(result.rc == mqtt.MQTT_ERR_SUCCESS for result in results):
+            self.published += 1
+            return True
+        self.errors += 1
+        print("Failed to send data. MQTT client returned an error.")
+        return False
+
+    def changed(self, command):
+        if self.sent is None:
+            return True
+        return max(abs(command[0] - self.sent[0]), abs(command[1] - self.sent[1])) > self.deadband
+
+    def run(self):
+        """
+        Background loop sending the newest command at the configured rate.
+        """
+        while self.running:
+            with self.condition:
+                self.condition.wait_for(lambda: self.fresh or not self.running, self.interval)
+            if self.latest is None:
+                continue
+
+            # Rate limit: newer submissions arriving meanwhile replace the command
+            now = time.monotonic()
+            if now - self.last_send_time < self.interval:
+                time.sleep(self.interval - (now - self.last_send_time))
+                now = time.monotonic()
+            with self.condition:
+                command, fresh, self.fresh = self.latest, self.fresh, False
+                submit_time = self.submit_time
+
+            if now - submit_time > self.max_command_age:
+                # Nothing new from vision/control: keep the robot stopped, heartbeat included
+                command = (0, 0)
+                if self.sent != command or now - self.last_send_time >= self.heartbeat:
+                    if self.send(command, now):
+                        self.stale += 1
+                continue
+
+            if self.changed(command) or now - self.last_send_time >= self.heartbeat:
+                self.send(command, now)
+            elif fresh:
+                self.skipped += 1
+
+    def send(self, command, now):
+        """
+        Publish a command; only a successful publish counts as sent, so failures are retried.
+        """
+        try:
+            ok = self.publish(command)
+        except Exception as e:
+            self.errors += 1
+            print(f"Error sending data via MQTT: {e}")
+            return False
+        if ok:
+            self.sent = command
+            self.last_send_time = now
+        return ok
+
+    def stats(self):
+        return {"published": self.published, "skipped": self.skipped, "stale": self.stale, "errors": self.errors}
+
+    def stop(self, stop_motors=True):
+        """
+        Stop the publisher thread, optionally sending a final zero-speed command.
+        """
+        self.running = False
+        with self.condition:
+            self.condition.notify_all()
+        self.thread.join(timeout=1.0)
+        if stop_motors:
+            self.publish((0, 0))
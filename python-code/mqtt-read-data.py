@@ -1,6 +1,7 @@
 import time
-import csv
 import paho.mqtt.client as mqtt
+from telemetry_recorder import TelemetryRecorder
+from telemetry_store import TelemetryStore
 
 # MQTT Broker
 MQTT_BROKER = "192.168.100.27"
@@ -14,8 +15,9 @@ MQTT_TOPICS = [
     "StatusValue"
 ]  # Daftar topik yang akan disubscribe
 
-# File CSV untuk menyimpan data
+# File CSV untuk menyimpan data (file dirotasi otomatis: motor_data-YYYYmmdd-HHMMSS.csv)
 CSV_FILE = "motor_data.csv"
+LOG_FORMAT = "csv"  # "csv" atau "bin" (NumPy records, bisa dibaca dengan np.memmap)
 
 # Variabel global untuk menyimpan data dari topik MQTT
 mqtt_data = {
@@ -27,17 +29,11 @@ mqtt_data = {
     "StatusValue": 0
 }
 
-# Fungsi untuk menulis data ke file CSV
-def write_to_csv():
-    try:
-        with open(CSV_FILE, mode="a", newline="") as file:
-            writer = csv.writer(file)
-            timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
-            row = [timestamp] + [mqtt_data[key] for key in MQTT_TOPICS]
-            writer.writerow(row)
-            print(f"Data written to CSV: {row}")
-    except Exception as e:
-        print(f"Error writing to CSV: {e}")
+# Recorder dengan ring buffer; thread latar belakang menulis ke disk per batch
+recorder = TelemetryRecorder(CSV_FILE, MQTT_TOPICS, fmt=LOG_FORMAT)
+
+# Riwayat per topik dengan timestamp monotonic, untuk query nilai pada waktu tertentu
+telemetry = TelemetryStore(MQTT_TOPICS)
 
 # Fungsi untuk menerima data MQTT
 def on_message(client, userdata, message):
@@ -48,10 +44,9 @@ def on_message(client, userdata, message):
 
         if topic in mqtt_data:
             mqtt_data[topic] = payload
-            print(f"Received from MQTT: {topic} = {payload}")
-
-        # Simpan data ke file CSV
-        write_to_csv()
+            # Simpan data ke ring buffer (tanpa I/O di network loop paho)
+            recorder.record(topic, payload)
+            telemetry.record(topic, payload)
 
     except Exception as e:
         print(f"Error processing MQTT message: {e}")
@@ -84,16 +79,6 @@ except Exception as e:
     print(f"Error connecting to MQTT broker: {e}")
     exit(1)
 
-# Create the CSV file and write the header if it doesn't exist
-try:
-    with open(CSV_FILE, mode="w", newline="") as file:
-        writer = csv.writer(file)
-        writer.writerow(["Timestamp"] + MQTT_TOPICS)
-        print(f"CSV file {CSV_FILE} created with headers.")
-except Exception as e:
-    print(f"Error creating CSV file: {e}")
-    exit(1)
-
 # Loop untuk menjalankan program (tanpa RTSP)
 print("Running MQTT data logger. Press Ctrl+C to exit.")
 try:
@@ -102,4 +87,7 @@ try:
 except KeyboardInterrupt:
     print("\nProgram terminated.")
     client.loop_stop()
-    client.disconnect()
\ No newline at end of file
+    client.disconnect()
+    recorder.close()
+    print(f"Telemetry: {recorder.stats()}")
+    print(f"Last values: {telemetry.snapshot()}")
\ No newline at end of file
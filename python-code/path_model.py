@@ -0,0 +1,164 @@
+import math
+
+import numpy as np
+
+
+class CenterlineFit:
+    def __init__(self, coefficients, y_bottom, y_top):
+        """
+        Centerline x(y) fitted through ROI midpoints, valid between y_top and y_bottom.
+
+        Args:
+            coefficients (numpy.ndarray): np.polyfit coefficients of x as a function of (y_bottom - y).
+            y_bottom, y_top (float): Frame rows of the lowest and highest midpoint used.
+        """
+        self.coefficients = coefficients
+        self.y_bottom = y_bottom
+        self.y_top = y_top
+
+    @property
+    def span(self):
+        """Rows between the lowest and the highest midpoint."""
+        return self.y_bottom - self.y_top
+
+    def heading_at(self, distance):
+        """Angle of the centerline from vertical in radians, positive to the right."""
+        if len(self.coefficients) < 2:
+            return 0.0
+        return math.atan(np.polyval(np.polyder(self.coefficients), distance))
+
+    def curvature_at(self, distance):
+        """Curvature in 1/pixel, positive when bending right."""
+        if len(self.coefficients) < 3:
+            return 0.0
+        slope = np.polyval(np.polyder(self.coefficients), distance)
+        second = np.polyval(np.polyder(self.coefficients, 2), distance)
+        return float(second / (1.0 + slope * slope) ** 1.5)
+
+    def x_at(self, distance):
+        """
+        Centerline x `distance` rows above the lowest midpoint.
+
+        Inside the fitted span this is the fit itself. Beyond the highest midpoint the path
+        continues with the heading and curvature it has there, so lookahead points past the
+        top ROI still follow the bend.
+        """
+        distance = max(distance, 0.0)
+        if distance <= self.span:
+            return float(np.polyval(self.coefficients, distance))
+        beyond = distance - self.span
+        slope = math.tan(self.heading_at(self.span))
+        second = self.curvature_at(self.span) * (1.0 + slope * slope) ** 1.5
+        return float(np.polyval(self.coefficients, self.span) + slope * beyond + 0.5 * second * beyond * beyond)
+
+    @property
+    def offset(self):
+        """Centerline x at the lowest midpoint."""
+        return self.x_at(0.0)
+
+    @property
+    def heading(self):
+        """Heading at the lowest midpoint."""
+        return self.heading_at(0.0)
+
+    @property
+    def curvature(self):
+        """Curvature at the lowest midpoint."""
+        return self.curvature_at(0.0)
+
+
+def fit_centerline(midpoints, prior=None):
+    """
+    Fit the centerline through every available ROI midpoint.
+
+    Three or more midpoints give a quadratic (offset, heading and curvature), two a line.
+    A single midpoint keeps the heading and curvature of `prior` (a vertical centerline
+    without one), since one point carries no direction.
+
+    Args:
+        midpoints (dict): ROI -> (x, y) in frame coordinates or None, as calculate_roi_midpoints.
+        prior (CenterlineFit or None): Previous fit, used for the shape when only one midpoint is left.
+
+    Returns:
+        CenterlineFit or None: None when no ROI has a midpoint.
+    """
+    points = [point for point in midpoints.values() if point is not None]
+    if not points:
+        return None
+    xs = np.array([point[0] for point in points], dtype=np.float64)
+    ys = np.array([point[1] for point in points], dtype=np.float64)
+    y_bottom, y_top = ys.max(), ys.min()
+    degree = min(2, len(points) - 1)
+    if degree > 0:
+        coefficients = np.polyfit(y_bottom - ys, xs, degree)
+    elif prior is not None and len(prior.coefficients) > 1:
+        slope = math.tan(prior.heading)
+        second = prior.curvature * (1.0 + slope * slope) ** 1.5
+        coefficients = np.array([0.5 * second, slope, xs[0]])
+    else:
+        coefficients = xs[:1]
+    return CenterlineFit(coefficients, y_bottom, y_top)
+
+
+class LookaheadSteering:
+    def __init__(self, lookahead_rows=120, rows_per_speed_second=2.0, actuation_delay=0.05,
+                 straight_curvature=5e-4, max_lookahead_rows=300):
+        """
+        Pure-pursuit style steering error from a fitted centerline.
+
+        Instead of the bottom ROI's offset, the error is the centerline x at a lookahead point
+        ahead of the lowest midpoint, minus the frame center. The lookahead point is moved
+        further ahead by the distance the robot travels while the frame was processed and the
+        command takes effect, so slower inference aims further ahead instead of correcting
+        for where the robot used to be. Past the highest midpoint the centerline is extended
+        with its fitted heading and curvature, up to `max_lookahead_rows`. Distances are image
+        rows; no camera calibration is assumed, so `rows_per_speed_second` has to be tuned
+        for the camera mount.
+
+        Args:
+            lookahead_rows (float): Base lookahead distance in rows above the lowest midpoint.
+            rows_per_speed_second (float): Rows the scene moves per second per unit of motor speed.
+            actuation_delay (float): Seconds from publishing a command until the motors follow.
+            straight_curvature (float): Curvature magnitude below which the path counts as straight.
+            max_lookahead_rows (float): Upper bound of the latency-extended lookahead distance.
+        """
+        self.lookahead_rows = lookahead_rows
+        self.rows_per_speed_second = rows_per_speed_second
+        self.actuation_delay = actuation_delay
+        self.straight_curvature = straight_curvature
+        self.max_lookahead_rows = max_lookahead_rows
+        self.last_fit = None
+        self.last_lookahead = None
+
+    def lookahead(self, latency, speed):
+        """
+        Lookahead distance in rows for a pipeline latency in seconds and the current motor speed.
+        """
+        travelled = max(speed, 0.0) * self.rows_per_speed_second * (max(latency, 0.0) + self.actuation_delay)
+        return min(self.lookahead_rows + travelled, self.max_lookahead_rows)
+
+    def error(self, midpoints, frame_center_x, latency=0.0, speed=0.0):
+        """
+        Steering error in pixels, to be used in place of the bottom ROI's offset.
+
+        Args:
+            midpoints (dict): ROI -> (x, y) or None.
+            frame_center_x (float): Column the robot is centered on.
+            latency (float): Seconds since the frame was captured.
+            speed (float): Current forward motor speed, e.g. the mean of the last wheel command.
+
+        Returns:
+            float or None: Error, None when no ROI has a midpoint.
+        """
+        fit = fit_centerline(midpoints, prior=self.last_fit)
+        self.last_fit = fit
+        if fit is None:
+            return None
+        self.last_lookahead = self.lookahead(latency, speed)
+        return fit.x_at(self.last_lookahead) - frame_center_x
+
+    def is_straight(self):
+        """
+        True when the last fitted centerline is (close to) straight.
+        """
+        return self.last_fit is None or abs(self.last_fit.curvature) < self.straight_curvature
@@ -0,0 +1,273 @@
+import argparse
+import importlib.util
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+PROGRAM_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "program-v1.py")
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+STAGES = ["segmentation", "roi_midpoints", "straight_path", "pid", "total"]
+
+
+def load_program_module(path=PROGRAM_PATH):
+    """
+    Import program-v1.py (not importable by name because of the dash) as a module.
+
+    Returns:
+        module: The loaded module exposing ROICenterlineProcessor.
+    """
+    spec = importlib.util.spec_from_file_location("program_v1", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class StubMasks:
+    def __init__(self, data):
+        self.data = data
+
+
+class StubResult:
+    def __init__(self, frame, masks):
+        self.frame = frame
+        self.masks = StubMasks(masks) if masks is not None else None
+        self.boxes = None
+
+    def plot(self):
+        return self.frame.copy()
+
+
+class StubSegmentationModel:
+    def __init__(self, imgsz=640, latency=0.0, seed=0):
+        """
+        CPU-only stand-in for the YOLO model producing a synthetic path mask.
+
+        The mask has the letterboxed shape YOLO would return for the frame, and the
+        corridor drifts from call to call so ROI midpoints and the PID error change.
+
+        Args:
+            imgsz (int): Model input size (long side).
+            latency (float): Extra seconds to sleep per call to emulate inference time.
+            seed (int): Seed for the corridor drift.
+        """
+        self.imgsz = imgsz
+        self.latency = latency
+        self.rng = np.random.default_rng(seed)
+        self.calls = 0
+
+    def mask_shape(self, frame_shape):
+        height, width = frame_shape[:2]
+        gain = self.imgsz / max(height, width)
+        new_h, new_w = int(round(height * gain)), int(round(width * gain))
+        # Minimal rectangle padding to a multiple of the model stride
+        return new_h + (-new_h % 32), new_w + (-new_w % 32)
+
+    def corridor(self, mask_h, mask_w):
+        """
+        Build a (1, H, W) float mask of a curved corridor.
+        """
+        shift = np.sin(self.calls / 15.0) * mask_w * 0.15 + self.rng.normal(0, 2)
+        curve = np.sin(self.calls / 40.0) * 0.4
+        rows = np.arange(mask_h, dtype=np.float32)
+        depth = 1.0 - rows / mask_h
+        center = mask_w / 2 + shift * (1 - depth) + curve * mask_w * depth ** 2
+        half_width = mask_w * (0.1 + 0.25 * (1 - depth))
+        cols = np.arange(mask_w, dtype=np.float32)
+        inside = np.abs(cols[None, :] - center[:, None]) < half_width[:, None]
+        inside[: int(mask_h * 0.15)] = False  # Horizon
+        return inside[None].astype(np.float32)
+
+    def __call__(self, frame, **kwargs):
+        """
+        Segment one frame, or a list of frames as one batch (one latency sleep per call).
+        """
+        frames = frame if isinstance(frame, list) else [frame]
+        if self.latency > 0:
+            time.sleep(self.latency)
+        results = []
+        for item in frames:
+            self.calls += 1
+            results.append(StubResult(item, self.corridor(*self.mask_shape(item.shape))))
+        return results
+
+
+def load_frames(sources, max_frames=300, synthetic=0, size=(640, 480)):
+    """
+    Load benchmark frames into memory so decoding is not part of the measurement.
+
+    Args:
+        sources (list of str): Image files, video files or directories of images.
+        max_frames (int): Maximum number of frames taken from each video.
+        synthetic (int): Number of random synthetic frames to add.
+        size (tuple): (width, height) of synthetic frames.
+
+    Returns:
+        list: List of BGR frames.
+    """
+    frames = []
+    for source in sources:
+        if os.path.isdir(source):
+            paths = sorted(os.path.join(source, name) for name in os.listdir(source)
+                           if name.lower().endswith(IMAGE_EXTENSIONS))
+        else:
+            paths = [source]
+
+        for path in paths:
+            if path.lower().endswith(IMAGE_EXTENSIONS):
+                frame = cv2.imread(path)
+                if frame is None:
+                    print(f"Error: Image not accessible: {path}")
+                    continue
+                frames.append(frame)
+                continue
+
+            cap = cv2.VideoCapture(path)
+            count = 0
+            while count < max_frames:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                frames.append(frame)
+                count += 1
+            cap.release()
+
+    rng = np.random.default_rng(0)
+    width, height = size
+    for _ in range(synthetic):
+        frames.append(rng.integers(0, 256, (height, width, 3), dtype=np.uint8))
+    return frames
+
+
+def summarize(samples):
+    """
+    Summarize latency samples in milliseconds.
+
+    Returns:
+        dict: count, mean, p50, p95, p99 and max latency in ms.
+    """
+    values = np.asarray(samples, dtype=np.float64) * 1000.0
+    if values.size == 0:
+        return {"count": 0}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "count": int(values.size),
+        "mean_ms": float(values.mean()),
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+        "max_ms": float(values.max()),
+    }
+
+
+def run_benchmark(processor, frames, iterations=None, warmup=5):
+    """
+    Feed frames through each pipeline stage and collect per-stage latencies.
+
+    Args:
+        processor (ROICenterlineProcessor): Processor to measure (capture is not used).
+        frames (list): Frames to replay, cycled until `iterations` are done.
+        iterations (int or None): Number of measured frames, defaults to len(frames).
+        warmup (int): Unmeasured frames run first.
+
+    Returns:
+        dict: Per-stage latency summaries and end-to-end frames per second.
+    """
+    if not frames:
+        raise ValueError("No frames to benchmark")
+    iterations = iterations or len(frames)
+    samples = {stage: [] for stage in STAGES}
+
+    for i in range(warmup):
+        processor.process_segmentation(frames[i % len(frames)])
+
+    start = time.perf_counter()
+    for i in range(iterations):
+        frame = frames[i % len(frames)]
+
+        t0 = time.perf_counter()
+        _, binary_mask = processor.process_segmentation(frame)
+        t1 = time.perf_counter()
+        midpoints = processor.calculate_roi_midpoints(binary_mask)
+        t2 = time.perf_counter()
+        processor.detect_straight_path(midpoints)
+        t3 = time.perf_counter()
+        bottom = midpoints.get(max(midpoints)) if midpoints else None
+        if bottom is not None:
+            processor.calculate_pid_correction(bottom[0] - frame.shape[1] / 2)
+        t4 = time.perf_counter()
+
+        samples["segmentation"].append(t1 - t0)
+        samples["roi_midpoints"].append(t2 - t1)
+        samples["straight_path"].append(t3 - t2)
+        samples["pid"].append(t4 - t3)
+        samples["total"].append(t4 - t0)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "frames": iterations,
+        "fps": iterations / elapsed if elapsed > 0 else None,
+        "stages": {stage: summarize(values) for stage, values in samples.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark of the segmentation-to-steering pipeline.")
+    parser.add_argument("sources", nargs="*", help="Images, videos or image directories to replay.")
+    parser.add_argument("--model", default="stub", help="YOLO weights path, or 'stub' for the CPU stand-in.")
+    parser.add_argument("--backend", default="torch", help="Inference backend: torch, onnx, openvino or auto.")
+    parser.add_argument("--threads", type=int, default=None, help="CPU inference threads.")
+    parser.add_argument("--stub-latency", type=float, default=0.0, help="Emulated stub inference time in ms.")
+    parser.add_argument("--imgsz", type=int, default=640, help="Model input size.")
+    parser.add_argument("--synthetic", type=int, default=0, help="Number of synthetic frames to add.")
+    parser.add_argument("--size", default="640x480", help="Synthetic frame size WIDTHxHEIGHT.")
+    parser.add_argument("--iterations", type=int, default=None, help="Measured frames (default: all frames once).")
+    parser.add_argument("--warmup", type=int, default=5, help="Unmeasured warmup frames.")
+    parser.add_argument("--active-rois", default="2,5,7", help="Comma separated ROI indices.")
+    parser.add_argument("--input-mask", action="store_true", help="Analyse ROIs at model input mask size.")
+    parser.add_argument("--crop-rois", action="store_true", help="Segment only the active ROI band.")
+    parser.add_argument("--output", default=None, help="Write the JSON report to this file.")
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.size.lower().split("x"))
+    frames = load_frames(args.sources, synthetic=args.synthetic, size=(width, height))
+    if not frames:
+        frames = load_frames([], synthetic=30, size=(width, height))
+
+    if args.model == "stub":
+        model = StubSegmentationModel(imgsz=args.imgsz, latency=args.stub_latency / 1000.0)
+    else:
+        model = args.model
+
+    program = load_program_module()
+    active_rois = [int(v) for v in args.active_rois.split(",")]
+    processor = program.ROICenterlineProcessor(None, model, active_rois, 0.1, 0.0, 0.0, 30,
+                                               input_mask_resolution=args.input_mask, headless=True,
+                                               crop_to_rois=args.crop_rois,
+                                               inference_backend=args.backend, imgsz=args.imgsz,
+                                               inference_threads=args.threads)
+
+    report = run_benchmark(processor, frames, args.iterations, args.warmup)
+    report["config"] = {
+        "model": args.model,
+        "backend": args.backend if args.model != "stub" else "stub",
+        "imgsz": args.imgsz,
+        "threads": args.threads,
+        "sources": args.sources,
+        "active_rois": active_rois,
+        "input_mask": args.input_mask,
+        "crop_rois": args.crop_rois,
+        "frame_shape": list(frames[0].shape),
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+
+class LatencyHistogram:
+    def __init__(self, window=1000):
+        """
+        Rolling window of latency samples in seconds.
+
+        Args:
+            window (int): Number of most recent samples kept.
+        """
+        self.samples = np.zeros(window, dtype=np.float64)
+        self.count = 0
+
+    def add(self, seconds):
+        self.samples[self.count % len(self.samples)] = seconds
+        self.count += 1
+
+    def summary(self):
+        """
+        Summarize the window in milliseconds.
+
+        Returns:
+            dict: count, mean, p50, p95, p99 and max latency in ms.
+        """
+        values = self.samples[:min(self.count, len(self.samples))] * 1000.0
+        if values.size == 0:
+            return {"count": 0}
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        return {
+            "count": self.count,
+            "mean_ms": round(float(values.mean()), 3),
+            "p50_ms": round(float(p50), 3),
+            "p95_ms": round(float(p95), 3),
+            "p99_ms": round(float(p99), 3),
+            "max_ms": round(float(values.max()), 3),
+        }
+
+
+class PipelineMetrics:
+    def __init__(self, window=1000):
+        """
+        Per-stage timing spans feeding rolling latency histograms.
+
+        Stages used by the navigation loop: capture_wait, inference, mask_postprocess,
+        control, publish and glass_to_command (frame capture timestamp to command publish).
+
+        Args:
+            window (int): Samples kept per histogram.
+        """
+        self.window = window
+        self.histograms = {}
+        self.counters = {}
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+        self.server = None
+        self.log_thread = None
+        self.running = False
+
+    def record(self, name, seconds):
+        """
+        Add one latency sample to the histogram `name`.
+        """
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = LatencyHistogram(self.window)
+            histogram.add(seconds)
+
+    def increment(self, name, value=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    @contextmanager
+    def span(self, name):
+        """
+        Time the enclosed block and record it under `name`.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def snapshot(self):
+        """
+        Return all histogram summaries and counters.
+
+        Returns:
+            dict: JSON-serializable metrics.
+        """
+        with self.lock:
+            stages = {name: histogram.summary() for name, histogram in self.histograms.items()}
+            counters = dict(self.counters)
+        return {
+            "uptime_s": round(time.monotonic() - self.started, 3),
+            "stages": stages,
+            "counters": counters,
+        }
+
+    def start_http_server(self, port=9100, host="127.0.0.1"):
+        """
+        Serve the metrics snapshot as JSON on http://host:port/metrics.
+        """
+        metrics = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip("/") not in ("", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = json.dumps(metrics.snapshot()).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Keep request logs out of the console
+
+        self.server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        print(f"Metrics available at http://{host}:{port}/metrics")
+
+    def start_log(self, interval=5.0):
+        """
+        Print the metrics snapshot as one JSON line every `interval` seconds.
+        """
+        self.running = True
+
+        def log_loop():
+            while self.running:
+                time.sleep(interval)
+                if self.running:
+                    print(json.dumps({"metrics": self.snapshot()}))
+
+        self.log_thread = threading.Thread(target=log_loop, daemon=True)
+        self.log_thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
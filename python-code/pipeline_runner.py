@@ -0,0 +1,170 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from pipeline_metrics import PipelineMetrics
+
+
+class StopPipeline(Exception):
+    """
+    Raised by a stage to shut the whole pipeline down, e.g. when 'q' is pressed.
+    """
+
+
+class PipelineItem:
+    def __init__(self, seq, capture_time, payload):
+        self.seq = seq
+        self.capture_time = capture_time  # time.monotonic() at capture
+        self.payload = payload
+
+    def age(self):
+        return time.monotonic() - self.capture_time
+
+
+class Stage:
+    def __init__(self, name, func, workers=1, queue_size=2, blocking=True, drop_stale=False,
+                 ordered=False, drop_when_full=False):
+        """
+        One step of the pipeline.
+
+        Args:
+            name (str): Stage name, also the metrics span name.
+            func (callable): func(item) -> new payload, or None to drop the item.
+            workers (int): Items processed concurrently by this stage.
+            queue_size (int): Capacity of the bounded input queue.
+            blocking (bool): Run func on the thread pool so it does not stall the event loop.
+                             Use False only for cheap calls or calls that must stay on the
+                             main thread (OpenCV windows).
+            drop_stale (bool): Discard items older than the pipeline deadline before running func.
+            ordered (bool): Discard items older than the newest item this stage already handled,
+                            needed after stages with several workers.
+            drop_when_full (bool): Drop items instead of waiting when this stage's queue is full,
+                                   for lossy consumers such as the display.
+        """
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.queue_size = queue_size
+        self.blocking = blocking
+        self.drop_stale = drop_stale
+        self.ordered = ordered
+        self.drop_when_full = drop_when_full
+        self.last_seq = -1
+
+
+class PipelineRunner:
+    def __init__(self, source, stages, deadline=None, metrics=None):
+        """
+        Run a frame source and a chain of stages concurrently, connected by bounded queues.
+
+        A full queue makes the upstream stage wait (backpressure), so work never piles up
+        behind a slow stage; with a latest-frame source that means stale frames are skipped
+        at capture. Frames whose age exceeds `deadline` are discarded by stages marked
+        drop_stale before they cost any inference time. Blocking stages run on a thread pool,
+        so I/O waits (stream reads, MQTT/HTTP sends) overlap with compute.
+
+        Args:
+            source (callable): Blocking call returning (ret, payload, capture_time); ret False ends the run.
+            stages (list of Stage): Stages in order.
+            deadline (float or None): Maximum frame age in seconds at drop_stale stages.
+            metrics (PipelineMetrics or None): Receives one span per stage and drop counters.
+        """
+        self.source = source
+        self.stages = stages
+        self.deadline = deadline
+        self.metrics = metrics if metrics is not None else PipelineMetrics()
+        self.running = False
+        self.stop_requested = False
+
+    def timed(self, stage, item):
+        with self.metrics.span(stage.name):
+            return stage.func(item)
+
+    async def put(self, stage, queue, item):
+        if stage.drop_when_full:
+            try:
+                queue.put_nowait(item)
+            except asyncio.QueueFull:
+                self.metrics.increment(f"{stage.name}_dropped_full")
+        else:
+            await queue.put(item)
+
+    async def run_source(self, loop, executor, queue):
+        seq = 0
+        while self.running:
+            ret, payload, capture_time = await loop.run_in_executor(executor, self.source)
+            if not ret:
+                break
+            self.metrics.increment("frames")
+            await self.put(self.stages[0], queue, PipelineItem(seq, capture_time, payload))
+            seq += 1
+
+    async def run_worker(self, loop, executor, index, queues):
+        stage = self.stages[index]
+        inbox = queues[index]
+        outbox = queues[index + 1] if index + 1 < len(queues) else None
+        while True:
+            item = await inbox.get()
+            try:
+                if stage.drop_stale and self.deadline is not None and item.age() > self.deadline:
+                    self.metrics.increment(f"{stage.name}_dropped_stale")
+                    continue
+                if stage.ordered:
+                    if item.seq <= stage.last_seq:
+                        self.metrics.increment(f"{stage.name}_dropped_out_of_order")
+                        continue
+                    stage.last_seq = item.seq
+
+                if stage.blocking:
+                    payload = await loop.run_in_executor(executor, self.timed, stage, item)
+                else:
+                    payload = self.timed(stage, item)
+
+                if payload is not None and outbox is not None:
+                    item.payload = payload
+                    await self.put(self.stages[index + 1], outbox, item)
+            except StopPipeline:
+                self.stop()
+            except Exception as e:
+                self.metrics.increment(f"{stage.name}_errors")
+                print(f"Error in pipeline stage {stage.name}: {e}")
+            finally:
+                inbox.task_done()
+
+    async def run_async(self):
+        loop = asyncio.get_running_loop()
+        threads = 1 + sum(stage.workers for stage in self.stages if stage.blocking)
+        executor = ThreadPoolExecutor(max_workers=threads)
+        queues = [asyncio.Queue(maxsize=stage.queue_size) for stage in self.stages]
+        workers = [asyncio.create_task(self.run_worker(loop, executor, index, queues))
+                   for index, stage in enumerate(self.stages) for _ in range(stage.workers)]
+
+        self.running = True
+        source = asyncio.create_task(self.run_source(loop, executor, queues[0]))
+        try:
+            # The source ends when the stream does or when a stage requests a stop
+            while not source.done():
+                await asyncio.wait([source], timeout=0.1)
+                if self.stop_requested:
+                    self.running = False
+            if source.exception() is not None:
+                raise source.exception()
+            if not self.stop_requested:
+                # Stream ended: let the frames in flight finish
+                for queue in queues:
+                    await queue.join()
+        finally:
+            self.running = False
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            executor.shutdown(wait=True)
+
+    def run(self):
+        """
+        Run the pipeline on the calling thread until the source ends or stop() is called.
+        """
+        asyncio.run(self.run_async())
+
+    def stop(self):
+        self.stop_requested = True
@@ -2,111 +2,242 @@ import cv2
 import numpy as np
 import time
 import logging
-from ultralytics import YOLO
+import paho.mqtt.client as mqtt
+from frame_grabber import LatestFrameGrabber
+from frame_bus import open_source
+from roi_midpoints import calculate_roi_midpoints, scale_midpoints, roi_band
+from mask_utils import union_masks, mask_for_frame
+from debug_renderer import DebugRenderer
+from pipeline_metrics import PipelineMetrics
+from segmentation_backend import load_backend
+from adaptive_cadence import AdaptiveCadence, CorridorTracker
+from motor_publisher import MotorCommandPublisher
+from inference_pool import InferenceWorkerPool
+from pipeline_runner import PipelineRunner, Stage, StopPipeline
+from session_recorder import ReplaySource, SessionRecorder
+from control_loop import FixedRateControlLoop, PIDController
+from path_model import LookaheadSteering
+from resolution_scaler import DEFAULT_LEVELS, ResolutionScaler
+from telemetry_store import TelemetryStore
 
 # Suppress YOLO debug outputs
 logging.getLogger("ultralytics").setLevel(logging.ERROR)
 
 
 class ROICenterlineProcessor:
-    def __init__(self, rtsp_url, model_path, active_rois, Kp, Ki, Kd, base_speed):
+    def __init__(self, rtsp_url, model_path, active_rois, Kp, Ki, Kd, base_speed, threaded_capture=True,
+                 input_mask_resolution=False, headless=False, render_fps=10,
+                 metrics_port=None, metrics_log_interval=None, verbose=False,
+                 inference_backend="torch", imgsz=640, inference_threads=None,
+                 adaptive_cadence=False, max_segmentation_interval=8, crop_to_rois=False,
+                 publisher=None, inference_workers=0, session_recorder=None,
+                 control_rate=None, control_policy="hold", control_output_limit=None, lookahead_rows=None,
+                 latency_budget=None, resolution_levels=None, telemetry=None):
         """
         Initialize the ROICenterlineProcessor with RTSP URL, YOLO model, and active ROIs.
 
         Args:
-            rtsp_url (str): URL of the RTSP stream.
-            model_path (str): Path to the YOLO model file.
+            rtsp_url (str, capture or None): URL of the RTSP stream, "bus:<name>" for a frame bus, an
+                                             already opened capture object with read()/release(),
+                                             or None for offline use.
+            model_path (str or callable): Path to the YOLO model file, or an already loaded model.
             active_rois (list of int): List of ROI indices to activate.
             Kp, Ki, Kd (float): PID controller gains.
             base_speed (int): Base speed for motors.
+            threaded_capture (bool): Decode the stream on a background thread and always
+                                     process the newest frame instead of OpenCV's buffered one.
+            input_mask_resolution (bool): Analyse ROIs on the mask at model input size (the letterboxed
+                                          imgsz ultralytics returns) and scale the midpoints to frame
+                                          coordinates instead of resizing the mask to the frame.
+                                          Ultralytics has already upsampled its prototypes to imgsz, so
+                                          this saves the resize to frame size, not that upsample.
+            headless (bool): Skip all annotation and display work on the control path.
+            render_fps (float): Maximum rate of the background debug renderer when not headless.
+            metrics_port (int or None): Serve stage latency metrics as JSON on this local port.
+            metrics_log_interval (float or None): Print a structured metrics line every N seconds.
+            verbose (bool): Print the control values of every frame.
+            inference_backend (str): "torch", "onnx", "openvino" or "auto" (fastest available on this host).
+            imgsz (int): Model input size.
+            inference_threads (int or None): CPU threads for inference, None keeps the runtime default.
+            adaptive_cadence (bool): Segment only every N frames (N adapted to inference latency, at most
+                                     max_segmentation_interval) and track the corridor in between.
+            max_segmentation_interval (int): Upper bound for N in adaptive cadence mode.
+            crop_to_rois (bool): Run the model only on the image band covering the active ROIs.
+                                 The mask then covers that band at frame scale.
+            publisher (MotorCommandPublisher or None): Sends every motor command to the robot.
+            inference_workers (int): Run segmentation in this many worker processes sharing a frame
+                                     ring (0 keeps it in this process). A URL is then decoded by a
+                                     separate capture process.
+            session_recorder (SessionRecorder or None): Records every frame with its midpoints and command.
+                                                        A ReplaySource given as rtsp_url replays one.
+            control_rate (float or None): Run the PID on its own thread at this rate in Hz, fed with the
+                                          newest vision measurement, instead of once per processed frame.
+            control_policy (str): "hold" or "extrapolate" the last measurement between frames.
+            control_output_limit (float or None): Clamp the fixed-rate PID correction to this value.
+            lookahead_rows (float or None): Steer on a centerline fitted through all active ROI midpoints,
+                                            evaluated this many rows ahead of the lowest one plus the
+                                            distance covered during the pipeline latency, instead of
+                                            on the bottom ROI alone.
+            latency_budget (float or None): Step the model input size up and down to keep segmentation
+                                            within this many seconds. Ignored for exported backends,
+                                            whose input size is fixed at export.
+            resolution_levels (list or None): Model input sizes from best to cheapest for the latency
+                                              budget, DEFAULT_LEVELS if None.
+            telemetry (TelemetryStore or None): MQTT telemetry history, looked up at each frame's capture time.
         """
         self.rtsp_url = rtsp_url
-        self.cap = cv2.VideoCapture(rtsp_url)
-        if not self.cap.isOpened():
+        self.pool = None
+        if inference_workers > 0:
+            if adaptive_cadence or crop_to_rois or latency_budget is not None:
+                raise ValueError("Worker processes support neither adaptive cadence, ROI cropping nor a latency budget")
+            self.pool = InferenceWorkerPool(model_path, active_rois, workers=inference_workers,
+                                            backend=inference_backend, imgsz=imgsz, threads=inference_threads,
+                                            input_mask_resolution=input_mask_resolution,
+                                            return_masks=not headless)
+            if isinstance(rtsp_url, (str, int)):
+                self.pool.start_capture(rtsp_url)
+                rtsp_url = None
+        if rtsp_url is None or hasattr(rtsp_url, "read"):
+            self.cap = rtsp_url
+        else:
+            # "bus:<name>" shares the decode of a running frame_bus.py producer
+            self.cap = open_source(rtsp_url, fallback=LatestFrameGrabber if threaded_capture else cv2.VideoCapture)
+        if self.cap is not None and not self.cap.isOpened():
             raise ValueError(f"Unable to connect to RTSP stream: {rtsp_url}")
-        self.model = YOLO(model_path)
+        if self.pool is not None:
+            self.model = None  # Every worker process loads its own
+        elif isinstance(model_path, str):
+            self.model = load_backend(model_path, inference_backend, imgsz=imgsz, threads=inference_threads)
+        else:
+            self.model = model_path
         self.active_rois = active_rois
         self.Kp = Kp
         self.Ki = Ki
         self.Kd = Kd
         self.base_speed = base_speed
+        self.input_mask_resolution = input_mask_resolution
+        self.mask_scale = (1.0, 1.0)  # Mask to frame coordinate scale of the last mask
+        self.crop_to_rois = crop_to_rois
+        self.mask_offset_y = 0        # Frame row of the first mask row
+        self.frame_height = None
+        self.frame_width = self.pool.ring.shape[1] if self.pool is not None else None
+        self.scaler = None
+        if latency_budget is not None and getattr(self.model, "backend", "torch") != "torch":
+            print("Latency budget ignored: exported models have a static input size")
+        elif latency_budget is not None:
+            levels = list(dict.fromkeys(resolution_levels or DEFAULT_LEVELS))
+            start_level = levels.index(imgsz) if imgsz in levels else 0
+            self.scaler = ResolutionScaler(latency_budget, levels, start_level=start_level)
+            if hasattr(self.model, "imgsz"):
+                self.model.imgsz = self.scaler.imgsz
+        self.headless = headless
+        self.renderer = None if headless else DebugRenderer(active_rois, fps=render_fps)
+        self.cadence = AdaptiveCadence(max_segmentation_interval) if adaptive_cadence else None
+        self.tracker = CorridorTracker(active_rois) if adaptive_cadence else None
+        self.frame_seq = 0
+        self.publisher = publisher
+        self.verbose = verbose
+        self.last_command = None
+        self.metrics = PipelineMetrics()
+        if metrics_port is not None:
+            self.metrics.start_http_server(metrics_port)
+        if metrics_log_interval is not None:
+            self.metrics.start_log(metrics_log_interval)
+        self.session_recorder = session_recorder
+        self.telemetry = telemetry
+        # Replay sources report the recorded capture time, so the PID sees the original time steps
+        self.clock = getattr(self.cap, "clock", time.time)
         self.prev_error = 0
         self.integral = 0
-        self.last_time = time.time()
+        self.last_time = self.clock()
+        self.steering = LookaheadSteering(lookahead_rows) if lookahead_rows is not None else None
+        self.control_loop = None
+        if control_rate is not None:
+            # Capture times are time.monotonic() (also for replays), the loop's own clock
+            self.control_loop = FixedRateControlLoop(
+                PIDController(Kp, Ki, Kd, output_limit=control_output_limit), base_speed, self.publish_command,
+                rate=control_rate, policy=control_policy)
 
     def process_segmentation(self, frame):
         """
         Perform YOLO instance segmentation on the frame and create a binary mask.
 
+        Annotation is left to the debug renderer so it never runs on the control path.
+
         Args:
             frame (numpy.ndarray): The input video frame.
 
         Returns:
-            tuple: (annotated_frame, binary_mask_frame)
-                   - annotated_frame: Frame with YOLO annotations.
-                   - binary_mask_frame: Binary mask frame (white for segmented regions, black for background).
+            tuple: (result, binary_mask_frame)
+                   - result: YOLO result for the frame (result.plot() gives the annotated frame).
+                   - binary_mask_frame: Single-channel binary mask (white for segmented regions, black for background),
+                                        at model input size when input_mask_resolution is set, covering only
+                                        the active ROI band when crop_to_rois is set.
         """
-        results = self.model(frame)
-        result = results[0]
-
-        # Generate annotated frame
-        annotated_frame = result.plot()
-
-        # Create binary mask
-        height, width = frame.shape[:2]
-        binary_mask_frame = np.zeros((height, width, 3), dtype=np.uint8)
+        self.frame_height, self.frame_width = frame.shape[:2]
+        if self.crop_to_rois:
+            # Only the band feeding the controller goes through the model; the model letterboxes it
+            start_y, end_y = roi_band(frame.shape[0], tuple(self.active_rois))
+            model_input = frame[start_y:end_y]
+        else:
+            start_y = 0
+            model_input = frame
+        self.mask_offset_y = start_y
+
+        start = time.perf_counter()
+        with self.metrics.span("inference"):
+            results = self.model(model_input)
+            result = results[0]
+
+        # Create binary mask: union of all instances on the device, one host copy
+        with self.metrics.span("mask_postprocess"):
+            height, width = model_input.shape[:2]
+            input_resolution = self.input_mask_resolution and not self.crop_to_rois
+            if result.masks is not None:
+                union = union_masks(result.masks.data)
+                binary_mask_frame, self.mask_scale = mask_for_frame(union, model_input.shape, input_resolution)
+            else:
+                binary_mask_frame = np.zeros((height, width), dtype=np.uint8)
+                self.mask_scale = (1.0, 1.0)
 
-        if result.masks is not None:
-            mask = np.zeros((height, width), dtype=np.uint8)
-            for seg in result.masks.data:
-                seg = seg.cpu().numpy()
-                seg = (seg > 0.5).astype(np.uint8)
-                mask = cv2.bitwise_or(mask, seg)
+        if self.scaler is not None and self.scaler.record(time.perf_counter() - start):
+            self.apply_resolution()
+        return result, binary_mask_frame
 
-            binary_mask_frame = cv2.merge([mask * 255] * 3)
+    def apply_resolution(self):
+        """
+        Switch the model to the input size chosen by the resolution scaler.
+        """
+        if hasattr(self.model, "imgsz"):
+            self.model.imgsz = self.scaler.imgsz
+        self.metrics.increment("resolution_changes")
+        print(f"Segmentation input: imgsz {self.scaler.imgsz}")
 
-        return annotated_frame, binary_mask_frame
+    def frame_center_x(self):
+        """
+        Horizontal center of the processed frames, 320 until the first frame was seen.
+        """
+        return self.frame_width / 2 if self.frame_width else 320
 
     def calculate_roi_midpoints(self, binary_mask):
         """
         Calculate midpoints for the active ROIs.
 
+        Left and right edges of every active ROI are found in one vectorized pass over
+        the mask, without Canny or a per-row Python loop.
+
         Args:
-            binary_mask (numpy.ndarray): Binary mask frame (white for segmented regions, black for background).
+            binary_mask (numpy.ndarray): Binary mask frame (white for segmented regions, black for background),
+                                         single-channel or 3-channel.
 
         Returns:
-            dict: Dictionary of midpoints for active ROIs with ROI index as the key.
+            dict: Dictionary of midpoints for active ROIs with ROI index as the key, in frame coordinates.
         """
-        gray_mask = cv2.cvtColor(binary_mask, cv2.COLOR_BGR2GRAY)
-        height, width = gray_mask.shape
-        roi_height = height // 10
-
-        midpoints = {}
-
-        for roi_index in self.active_rois:
-            start_y = roi_index * roi_height
-            end_y = (roi_index + 1) * roi_height
-            roi = gray_mask[start_y:end_y, :]
-
-            edges = cv2.Canny(roi, threshold1=50, threshold2=150)
-
-            rows, cols = roi.shape
-            left, right = None, None
-            for y in range(rows):
-                edge_indices = np.where(edges[y, :] > 0)[0]
-                if len(edge_indices) >= 2:
-                    left = edge_indices[0]
-                    right = edge_indices[-1]
-                    break
-
-            if left is not None and right is not None:
-                midpoint_x = (left + right) // 2
-                midpoint_y = start_y + roi_height // 2
-                midpoints[roi_index] = (midpoint_x, midpoint_y)
-            else:
-                midpoints[roi_index] = None
-
-        return midpoints
+        if self.crop_to_rois:
+            return calculate_roi_midpoints(binary_mask, self.active_rois,
+                                           frame_height=self.frame_height, row_offset=self.mask_offset_y)
+        midpoints = calculate_roi_midpoints(binary_mask, self.active_rois)
+        return scale_midpoints(midpoints, self.mask_scale)
 
     def detect_straight_path(self, midpoints):
         """
@@ -135,7 +266,7 @@ class ROICenterlineProcessor:
         Returns:
             float: PID correction value.
         """
-        current_time = time.time()
+        current_time = self.clock()
         dt = current_time - self.last_time
         self.last_time = current_time
 
@@ -146,71 +277,321 @@ class ROICenterlineProcessor:
         correction = self.Kp * error + self.Ki * self.integral + self.Kd * derivative
         return correction
 
-    def process_stream(self):
+    def read_frame(self):
         """
-        Process the RTSP stream with YOLO segmentation and display the results.
+        Read the next frame together with its capture timestamp.
+
+        Returns:
+            tuple: (ret, frame, capture_time) with capture_time on the time.monotonic() clock.
         """
-        frame_center_x = 320  # Assuming a frame width of 640
-        while True:
-            ret, frame = self.cap.read()
-            if not ret:
-                break
+        with self.metrics.span("capture_wait"):
+            if hasattr(self.cap, "read_latest"):
+                while True:
+                    ret, frame, capture_time, self.frame_seq = self.cap.read_latest(timeout=10.0)
+                    # A grabber inside its reconnect backoff has not given up on the stream yet
+                    if ret or not getattr(self.cap, "reconnecting", False) or not self.cap.isOpened():
+                        break
+            else:
+                ret, frame = self.cap.read()
+                capture_time = time.monotonic()
+                self.frame_seq += 1
+        return ret, frame, capture_time
 
-            annotated_frame, binary_mask_frame = self.process_segmentation(frame)
-            midpoints = self.calculate_roi_midpoints(binary_mask_frame)
+    def frame_aligned_mask(self, binary_mask, frame):
+        """
+        Return the mask covering the whole frame, pasting a cropped ROI-band mask into place.
+        """
+        if not self.crop_to_rois:
+            return binary_mask
+        full_mask = np.zeros(frame.shape[:2], dtype=np.uint8)
+        full_mask[self.mask_offset_y:self.mask_offset_y + binary_mask.shape[0]] = binary_mask
+        return full_mask
 
-            # Detect straight path or not
-            is_straight = self.detect_straight_path(midpoints)
-            path_type = "Straight" if is_straight else "Not Straight"
+    def estimate_midpoints(self, frame):
+        """
+        Get the ROI midpoints of a frame, from segmentation or, in adaptive cadence mode,
+        from the corridor tracker when segmentation is not due and tracking is trusted.
 
-            # Use the bottom-most ROI for error calculation
-            if midpoints:
-                bottom_roi = max(midpoints.keys())
-                if midpoints[bottom_roi] is not None:
-                    midpoint_x = midpoints[bottom_roi][0]
-                    error = midpoint_x - frame_center_x
+        Args:
+            frame (numpy.ndarray): The input video frame.
 
-                    # Calculate PID correction
-                    correction = self.calculate_pid_correction(error)
+        Returns:
+            tuple: (result, binary_mask_frame, midpoints), result and mask are None for tracked frames.
+        """
+        if self.cadence is not None and not self.cadence.due():
+            with self.metrics.span("tracking"):
+                midpoints, confidence, drift = self.tracker.track(frame)
+            if self.cadence.accept(confidence, drift):
+                self.cadence.record_tracked()
+                self.metrics.increment("tracked_frames")
+                return None, None, midpoints
+
+        start = time.perf_counter()
+        result, binary_mask_frame = self.process_segmentation(frame)
+        midpoints = self.calculate_roi_midpoints(binary_mask_frame)
+        if self.cadence is not None:
+            self.cadence.record_inference(time.perf_counter() - start)
+            self.tracker.update(frame, self.frame_aligned_mask(binary_mask_frame, frame), midpoints)
+        return result, binary_mask_frame, midpoints
+
+    def publish_command(self, left_speed, right_speed, capture_time):
+        """
+        Emit the motor command and record the glass-to-command latency.
 
-                    # Calculate motor speeds
-                    left_speed = self.base_speed - correction
-                    right_speed = self.base_speed + correction
+        Args:
+            left_speed, right_speed (float): Motor speeds.
+            capture_time (float): time.monotonic() capture timestamp of the frame the command is based on.
+        """
+        with self.metrics.span("publish"):
+            self.last_command = (left_speed, right_speed)
+            if self.publisher is not None:
+                self.publisher.submit(right_speed, left_speed)
+        self.metrics.record("glass_to_command", time.monotonic() - capture_time)
+        self.metrics.increment("commands")
+
+    def compute_command(self, midpoints, capture_time=None):
+        """
+        Turn the ROI midpoints into motor speeds with the PID controller.
 
-                    # Print all relevant values in one line
-                    print(f"{path_type} | Error: {error:.2f} | Correction: {correction:.2f} | "
-                          f"Left Speed: {left_speed:.2f} | Right Speed: {right_speed:.2f}")
+        With a fixed-rate control loop the error is only handed to the loop, which emits the
+        commands itself, and None is returned.
 
-                    # Draw ROI midpoint
-                    cv2.circle(frame, (midpoint_x, int((bottom_roi + 0.5) * (frame.shape[0] // 10))), 5, (0, 255, 0), -1)
+        Args:
+            midpoints (dict): Dictionary of midpoints for active ROIs.
+            capture_time (float or None): time.monotonic() capture time of the frame, needed by the control loop.
 
-            # Draw ROI boxes
-            height, width = frame.shape[:2]
-            roi_height = height // 10
+        Returns:
+            tuple or None: (left_speed, right_speed), None when the bottom-most ROI has no midpoint.
+        """
+        frame_center_x = self.frame_center_x()
+
+        if self.steering is not None:
+            # Aim at the fitted centerline ahead, further ahead the older the frame already is
+            latency = time.monotonic() - capture_time if capture_time is not None else 0.0
+            # No wheel encoders: the last command sent is the speed the robot is actually driving
+            speed = sum(self.last_command) / 2 if self.last_command is not None else self.base_speed
+            error = self.steering.error(midpoints, frame_center_x, latency, speed)
+            if error is None:
+                return None
+            path_type = "Straight" if self.steering.is_straight() else "Not Straight"
+        else:
+            # Detect straight path or not
+            is_straight = self.detect_straight_path(midpoints)
+            path_type = "Straight" if is_straight else "Not Straight"
 
-            for roi_index in range(10):
-                start_y = roi_index * roi_height
-                end_y = (roi_index + 1) * roi_height
-                color = (255, 0, 0) if roi_index in self.active_rois else (100, 100, 100)
-                thickness = 2 if roi_index in self.active_rois else 1
-                cv2.rectangle(frame, (0, start_y), (width, end_y), color, thickness)
+            # Use the bottom-most ROI for error calculation
+            if not midpoints:
+                return None
+            bottom_roi = max(midpoints.keys())
+            if midpoints[bottom_roi] is None:
+                return None
+            midpoint_x = midpoints[bottom_roi][0]
+            error = midpoint_x - frame_center_x
+
+        # Robot state when the frame was taken, not when the message happened to be processed
+        robot_state = ""
+        if self.verbose and self.telemetry is not None:
+            at = capture_time if capture_time is not None else time.monotonic()
+            robot_state = " | " + " ".join(f"{topic}: {value}" for topic, value in self.telemetry.snapshot(at).items())
+
+        if self.control_loop is not None:
+            self.control_loop.update(error, capture_time)
+            if self.verbose:
+                print(f"{path_type} | Error: {error:.2f}{robot_state}")
+            return None
+
+        # Calculate PID correction
+        correction = self.calculate_pid_correction(error)
+
+        # Calculate motor speeds
+        left_speed = self.base_speed - correction
+        right_speed = self.base_speed + correction
+
+        # Print all relevant values in one line
+        if self.verbose:
+            print(f"{path_type} | Error: {error:.2f} | Correction: {correction:.2f} | "
+                  f"Left Speed: {left_speed:.2f} | Right Speed: {right_speed:.2f}{robot_state}")
+        return left_speed, right_speed
+
+    def record_session(self, frame, capture_time, seq, midpoints, command, binary_mask):
+        """
+        Hand the frame, its midpoints and the command to the session recorder.
+        """
+        if command is None and self.control_loop is not None:
+            command = self.last_command  # Newest command of the control loop
+        with self.metrics.span("record"):
+            self.session_recorder.record_frame(frame, capture_time, seq)
+            mask = self.frame_aligned_mask(binary_mask, frame) if binary_mask is not None else None
+            self.session_recorder.record_segmentation(seq, capture_time, midpoints, command, mask)
+
+    def process_stream(self):
+        """
+        Process the RTSP stream with YOLO segmentation and display the results.
 
-            # Display the frames
-            cv2.imshow('YOLO Annotated Frame', annotated_frame)
-            cv2.imshow('Binary Segmentation Mask', binary_mask_frame)
-            cv2.imshow('ROI Midpoints', frame)
+        In headless mode nothing is drawn or displayed; otherwise debug frames are handed
+        to the background renderer, which only builds them while a viewer is attached.
+        """
+        if self.pool is not None:
+            self.process_stream_workers()
+            return
+        try:
+            while True:
+                ret, frame, capture_time = self.read_frame()
+                if not ret:
+                    break
+                self.metrics.increment("frames")
+                if self.cadence is not None:
+                    self.cadence.record_frame(capture_time, self.frame_seq)
+
+                result, binary_mask_frame, midpoints = self.estimate_midpoints(frame)
+
+                with self.metrics.span("control"):
+                    command = self.compute_command(midpoints, capture_time)
+                if self.session_recorder is not None:
+                    self.record_session(frame, capture_time, self.frame_seq, midpoints, command, binary_mask_frame)
+                if command is not None:
+                    self.publish_command(command[0], command[1], capture_time)
+
+                if self.renderer is not None:
+                    self.renderer.submit(frame, result, binary_mask_frame, midpoints)
+                    if self.renderer.show() & 0xFF == ord('q'):
+                        break
+        except KeyboardInterrupt:
+            print("\nProgram terminated.")
+        finally:
+            self.cleanup()
+
+    def process_stream_workers(self):
+        """
+        Control loop for worker-process inference: feed frames into the pool (unless its
+        capture process does) and act on the newest completed result.
+        """
+        try:
+            while True:
+                if self.cap is not None:
+                    ret, frame, capture_time = self.read_frame()
+                    if not ret:
+                        break
+                    self.metrics.increment("frames")
+                    self.pool.submit(frame, capture_time)
+                    inference = self.pool.latest(timeout=0)
+                else:
+                    if not self.pool.capture_alive():
+                        break
+                    inference = self.pool.latest(timeout=0.1)
+                if inference is None:
+                    continue
+
+                with self.metrics.span("control"):
+                    command = self.compute_command(inference.midpoints, inference.capture_time)
+                frame = None
+                if self.session_recorder is not None or self.renderer is not None:
+                    # Private copy, verified after copying, as the capture side keeps overwriting slots
+                    frame = self.pool.frame(inference.seq, copy=True)
+                if self.session_recorder is not None and frame is not None:
+                    self.record_session(frame, inference.capture_time, inference.seq, inference.midpoints,
+                                        command, inference.mask)
+                if command is not None:
+                    self.publish_command(command[0], command[1], inference.capture_time)
+
+                if self.renderer is not None:
+                    if frame is not None:
+                        self.renderer.submit(frame, None, inference.mask, inference.midpoints)
+                    if self.renderer.show() & 0xFF == ord('q'):
+                        break
+        except KeyboardInterrupt:
+            print("\nProgram terminated.")
+        finally:
+            self.cleanup()
+
+    def run_pipeline(self, deadline=0.2, stage_workers=None, queue_size=2):
+        """
+        Process the stream as concurrent stages connected by bounded queues.
 
-            if cv2.waitKey(1) & 0xFF == ord('q'):
-                break
+        Capture, segmentation, control, publish and display run as separate stages, so a
+        slow stage applies backpressure instead of stalling the others, and frames older
+        than `deadline` are discarded before inference. Commands are only computed from
+        frames newer than the last one used, so the PID never goes back in time.
 
-        self.cleanup()
+        Args:
+            deadline (float or None): Maximum frame age in seconds when inference would start.
+            stage_workers (dict or None): Workers per stage name ("segmentation", "actuation").
+                                          More than one segmentation worker needs a model that
+                                          tolerates concurrent calls and no adaptive cadence.
+            queue_size (int): Capacity of every stage queue.
+        """
+        if self.pool is not None:
+            raise ValueError("run_pipeline runs inference in this process; use process_stream with worker processes")
+        stage_workers = stage_workers or {}
+        if stage_workers.get("segmentation", 1) > 1 and self.cadence is not None:
+            raise ValueError("Adaptive cadence needs a single segmentation worker")
+
+        def capture():
+            ret, frame, capture_time = self.read_frame()
+            if ret and self.cadence is not None:
+                self.cadence.record_frame(capture_time, self.frame_seq)
+            return ret, frame, capture_time
+
+        def segment(item):
+            frame = item.payload
+            return (frame,) + self.estimate_midpoints(frame)
+
+        def control(item):
+            command = self.compute_command(item.payload[3], item.capture_time)
+            if self.session_recorder is not None:
+                frame, _, binary_mask_frame, midpoints = item.payload
+                self.record_session(frame, item.capture_time, item.seq, midpoints, command, binary_mask_frame)
+            return item.payload + (command,)
+
+        def publish(item):
+            command = item.payload[4]
+            if command is not None:
+                self.publish_command(command[0], command[1], item.capture_time)
+            return item.payload
+
+        def display(item):
+            frame, result, binary_mask_frame, midpoints, _ = item.payload
+            self.renderer.submit(frame, result, binary_mask_frame, midpoints)
+            if self.renderer.show() & 0xFF == ord('q'):
+                raise StopPipeline()
+
+        stages = [
+            Stage("segmentation", segment, workers=stage_workers.get("segmentation", 1),
+                  queue_size=queue_size, drop_stale=True),
+            # One worker keeps the PID serial; it runs on the thread pool because session
+            # recording copies the frame, which must not hold up the event loop
+            Stage("control", control, queue_size=queue_size, ordered=True),
+            Stage("actuation", publish, workers=stage_workers.get("actuation", 1), queue_size=queue_size),
+        ]
+        if self.renderer is not None:
+            # Display runs on the event loop (main) thread for OpenCV and never holds up control
+            stages.append(Stage("display", display, queue_size=1, blocking=False, drop_when_full=True))
+
+        runner = PipelineRunner(capture, stages, deadline=deadline, metrics=self.metrics)
+        try:
+            runner.run()
+        except KeyboardInterrupt:
+            print("\nProgram terminated.")
+        finally:
+            self.cleanup()
 
     def cleanup(self):
         """
         Release resources and close display windows.
         """
-        self.cap.release()
-        cv2.destroyAllWindows()
+        if self.control_loop is not None:
+            self.control_loop.stop()
+        if self.cap is not None:
+            self.cap.release()
+        if self.renderer is not None:
+            self.renderer.stop()
+        if self.publisher is not None:
+            self.publisher.stop()
+        if self.pool is not None:
+            self.pool.stop()
+        if self.session_recorder is not None:
+            self.session_recorder.close()
+        self.metrics.stop()
 
 
 # Usage example
@@ -220,9 +601,47 @@ if __name__ == "__main__":
     active_rois = [2, 5, 7]  # Active ROIs: 2, 5, and 7
     base_speed = 30
     Kp, Ki, Kd = 0.1, 0.0, 0.0  # PID gains
+    headless = False  # Set True on the robot to skip all rendering
+    mqtt_broker = None  # e.g. "192.168.100.27" to drive the motors through arduino-code/mqtt-api
+    use_pipeline = False  # Run capture, inference, control and display as concurrent stages
+    record_session = None  # e.g. "sessions/run1" to record frames, midpoints, commands and telemetry
+    replay_session = None  # e.g. "sessions/run1" to drive the processor from a recording instead
+    control_rate = None  # e.g. 50 to run the PID at a fixed 50 Hz between frames
+    lookahead_rows = None  # e.g. 120 to steer on the fitted centerline ahead instead of the bottom ROI
+    latency_budget = None  # e.g. 1 / 15 to adapt the model input size to a 15 fps inference budget
 
     try:
-        roi_processor = ROICenterlineProcessor(rtsp_url, model_path, active_rois, Kp, Ki, Kd, base_speed)
-        roi_processor.process_stream()
+        publisher = None
+        telemetry = None
+        recorder = SessionRecorder(record_session, active_rois) if record_session is not None else None
+        if replay_session is not None:
+            telemetry = TelemetryStore()  # Filled with the recorded telemetry as frames are replayed
+            rtsp_url = ReplaySource(replay_session, speed=1.0, telemetry=telemetry)  # speed=None: no pacing
+        if mqtt_broker is not None:
+            client = mqtt.Client()
+            client.connect(mqtt_broker, 1883, keepalive=60)
+            if replay_session is None:  # A replay feeds the recorded telemetry instead of the live one
+                telemetry = TelemetryStore()
+
+                def on_message(client, userdata, msg):
+                    telemetry.on_message(client, userdata, msg)
+                    if recorder is not None:
+                        recorder.on_message(client, userdata, msg)
+
+                client.on_message = on_message
+                client.subscribe([(topic, 0) for topic in telemetry.topics])
+            client.loop_start()  # Start MQTT loop
+            publisher = MotorCommandPublisher(client)
+
+        roi_processor = ROICenterlineProcessor(rtsp_url, model_path, active_rois, Kp, Ki, Kd, base_speed,
+                                               headless=headless, metrics_log_interval=5.0,
+                                               publisher=publisher, session_recorder=recorder,
+                                               control_rate=control_rate, control_policy="extrapolate",
+                                               lookahead_rows=lookahead_rows, latency_budget=latency_budget,
+                                               telemetry=telemetry)
+        if use_pipeline:
+            roi_processor.run_pipeline(deadline=0.2)
+        else:
+            roi_processor.process_stream()
     except Exception as e:
         print(f"Error: {e}")
\ No newline at end of file
@@ -1,24 +1,39 @@
-import csv
+import glob
+import os
+import sys
+import time
 
-# Nama file CSV
+from telemetry_reader import TIMESTAMP_FORMAT, TelemetryLog
+
+# Nama file CSV dasar; TelemetryRecorder menulis file rotasi motor_data-YYYYmmdd-HHMMSS.csv/.bin
 CSV_FILE = "motor_data.csv"
 
+def latest_log(base_name):
+    # Pilih file rotasi terbaru, atau file lama tanpa rotasi jika belum ada
+    stem, _ = os.path.splitext(base_name)
+    rotated = glob.glob(f"{stem}-*.csv") + glob.glob(f"{stem}-*.bin")
+    if rotated:
+        return max(rotated, key=os.path.getmtime)
+    return base_name
+
 def read_csv(file_name):
     try:
-        with open(file_name, mode="r") as file:
-            reader = csv.DictReader(file)
-            print(f"Reading data from {file_name}:\n")
-            
-            # Menampilkan header
-            print("\t".join(reader.fieldnames))
-            
-            # Menampilkan isi file
-            for row in reader:
-                print(f"{row['Timestamp']}\t{row['TurnValue']}\t{row['ThrottleValue']}\t{row['SafetyValue']}\t{row['ModeValue']}\t{row['ForwardValue']}\t{row['StatusValue']}")
+        # File di-memory-map, dibaca per chunk tanpa membuat dict per baris
+        log = TelemetryLog(file_name)
+        print(f"Reading data from {file_name}:\n")
+
+        # Menampilkan header
+        print("\t".join(["Timestamp"] + log.topics))
+
+        # Menampilkan isi file
+        for chunk in log.chunks():
+            stamps = [time.strftime(TIMESTAMP_FORMAT, time.localtime(t)) for t in chunk["WallTime"]]
+            values = [chunk[topic].astype(str) for topic in log.topics]
+            print("\n".join("\t".join(row) for row in zip(stamps, *values)))
     except FileNotFoundError:
         print(f"Error: File {file_name} not found.")
     except Exception as e:
         print(f"Error reading CSV file: {e}")
 
-# Memanggil fungsi untuk membaca CSV
-read_csv(CSV_FILE)
\ No newline at end of file
+# Memanggil fungsi untuk membaca CSV (path bisa diberikan sebagai argumen)
+read_csv(sys.argv[1] if len(sys.argv) > 1 else latest_log(CSV_FILE))
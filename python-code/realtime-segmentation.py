@@ -1,9 +1,11 @@
-from ultralytics import YOLO
 import cv2
+from frame_bus import open_source
+from segmentation_backend import load_backend
 
-model = YOLO('python-code/yolo11s-seg-v1-train10.pt')
-#cap = cv2.VideoCapture(0)
-cap = cv2.VideoCapture('http://192.168.100.27:4747/video')
+model = load_backend('python-code/yolo11s-seg-v1-train10.pt', backend='auto')
+#cap = open_source(0)
+#cap = open_source('bus:camera')  # Shared decode, start python-code/frame_bus.py first
+cap = open_source('http://192.168.100.27:4747/video')
 
 while True:
     ret, frame = cap.read()
@@ -1,18 +1,20 @@
 import cv2
 import numpy as np
-from ultralytics import YOLO
+from segmentation_backend import load_backend
 
 class RobotNavigation:
-    def __init__(self, ImagePath, ModelPath="python-code\\model-v1.pt", TotalSections=10, ActiveSections=None):
+    def __init__(self, ImagePath, ModelPath="python-code\\model-v1.pt", TotalSections=10, ActiveSections=None,
+                 Backend="auto"):
         """
         Initialize the robot with an image source and YOLO model for segmentation.
         :param ImagePath: Path to the image file (e.g., 'path/to/image.jpg').
         :param ModelPath: Path to the YOLOv11 model file for instance segmentation.
         :param TotalSections: Total number of horizontal sections to divide the frame.
         :param ActiveSections: Specific sections that will be highlighted.
+        :param Backend: Inference backend: "torch", "onnx", "openvino" or "auto" (fastest available).
         """
         self.ImagePath = ImagePath
-        self.Model = YOLO(ModelPath)
+        self.Model = load_backend(ModelPath, Backend)
         self.TotalSections = TotalSections
         self.SectionHeight = None  # To be defined based on image dimensions
         self.ActiveSections = ActiveSections if ActiveSections is not None else list(range(1, TotalSections + 1))
@@ -0,0 +1,83 @@
+# Model input sizes from best quality to cheapest; multiples of 32 for YOLO
+DEFAULT_LEVELS = [640, 512, 416, 320]
+
+
+class ResolutionScaler:
+    def __init__(self, budget, levels=DEFAULT_LEVELS, start_level=0, high_water=0.9, low_water=0.6,
+                 dwell=15, smoothing=0.2):
+        """
+        Step the model input size to keep inference inside a time budget.
+
+        The smoothed segmentation latency is compared against the budget. Above
+        `high_water` * budget the next cheaper level is used; below `low_water` * budget the
+        next better level is used, but only if its expected latency (scaled by the pixel
+        ratio) stays under `high_water` * budget. After a change at least `dwell` frames are
+        measured before the next one, so the two thresholds and the dwell keep it from
+        oscillating between neighbouring levels.
+
+        Only imgsz changes the model's work: ultralytics letterboxes (and upscales) every input
+        to imgsz, so downscaling the frame beforehand would only cost mask resolution. Models
+        with a static input size (exported backends) cannot be scaled at all.
+
+        Args:
+            budget (float): Target segmentation latency per frame in seconds, e.g. 1 / camera fps.
+            levels (list of int): Model input sizes ordered from best to cheapest.
+            start_level (int): Index of the level used first.
+            high_water, low_water (float): Budget fractions to step down above / step up below.
+            dwell (int): Frames measured at a level before it may change again.
+            smoothing (float): Weight of new samples in the latency moving average.
+        """
+        if not levels:
+            raise ValueError("At least one resolution level is needed")
+        self.budget = budget
+        self.levels = list(levels)
+        self.level = min(max(start_level, 0), len(self.levels) - 1)
+        self.high_water = high_water
+        self.low_water = low_water
+        self.dwell = dwell
+        self.smoothing = smoothing
+        self.latency = None
+        self.samples = 0
+        self.changes = 0
+
+    @property
+    def imgsz(self):
+        return self.levels[self.level]
+
+    def cost(self, level):
+        """
+        Relative inference cost of a level, proportional to the pixels the model processes.
+        """
+        return self.levels[level] ** 2
+
+    def record(self, seconds):
+        """
+        Add a segmentation latency sample and change level if it is due.
+
+        Returns:
+            bool: True when the level changed; imgsz applies from the next frame.
+        """
+        self.latency = seconds if self.latency is None else self.latency + self.smoothing * (seconds - self.latency)
+        self.samples += 1
+        if self.samples < self.dwell:
+            return False
+
+        target = self.level
+        if self.latency > self.high_water * self.budget and self.level + 1 < len(self.levels):
+            target = self.level + 1
+        elif self.latency < self.low_water * self.budget and self.level > 0:
+            expected = self.latency * self.cost(self.level - 1) / self.cost(self.level)
+            if expected < self.high_water * self.budget:
+                target = self.level - 1
+        if target == self.level:
+            return False
+
+        self.level = target
+        self.latency = None  # Latency at the new level has to be measured afresh
+        self.samples = 0
+        self.changes += 1
+        return True
+
+    def stats(self):
+        return {"imgsz": self.imgsz, "changes": self.changes,
+                "latency_ms": self.latency * 1000.0 if self.latency is not None else None}
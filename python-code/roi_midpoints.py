@@ -0,0 +1,142 @@
+from functools import lru_cache
+
+import numpy as np
+
+
+def as_single_channel(binary_mask):
+    """
+    Return a 2D view of a binary mask.
+
+    Args:
+        binary_mask (numpy.ndarray): Single-channel mask, or a 3-channel mask with identical channels.
+
+    Returns:
+        numpy.ndarray: 2D mask (no copy for single-channel input).
+    """
+    if binary_mask.ndim == 3:
+        return binary_mask[:, :, 0]
+    return binary_mask
+
+
+def row_edges(binary_mask, rows=None):
+    """
+    Find the left and right edge of the foreground region on every requested row.
+
+    Args:
+        binary_mask (numpy.ndarray): Binary mask (non-zero for segmented regions).
+        rows (numpy.ndarray or None): Row indices to inspect, None inspects every row.
+
+    Returns:
+        tuple: (left, right, valid)
+               - left: First foreground column per row.
+               - right: Last foreground column per row.
+               - valid: True where the row contains any foreground pixel.
+    """
+    mask = as_single_channel(binary_mask)
+    if rows is not None:
+        mask = mask[rows]
+    fg = mask > 0
+    width = fg.shape[1]
+
+    valid = fg.any(axis=1)
+    left = fg.argmax(axis=1)
+    right = width - 1 - fg[:, ::-1].argmax(axis=1)
+    return left, right, valid
+
+
+def roi_row_indices(height, active_rois, num_rois=10):
+    """
+    Build the (num_active, roi_height) matrix of frame rows covered by the active ROIs.
+
+    Args:
+        height (int): Mask height in pixels.
+        active_rois (list of int): ROI indices counted from the top.
+        num_rois (int): Number of horizontal ROI bands in the frame.
+
+    Returns:
+        tuple: (rows, roi_height)
+    """
+    roi_height = height // num_rois
+    starts = np.asarray(active_rois, dtype=np.intp) * roi_height
+    rows = starts[:, None] + np.arange(roi_height, dtype=np.intp)[None, :]
+    return rows, roi_height
+
+
+@lru_cache(maxsize=32)
+def roi_band(height, active_rois, num_rois=10):
+    """
+    Return the row range covering all active ROIs, cached per resolution and ROI configuration.
+
+    Args:
+        height (int): Frame height in pixels.
+        active_rois (tuple of int): ROI indices counted from the top.
+        num_rois (int): Number of horizontal ROI bands in the frame.
+
+    Returns:
+        tuple: (start_y, end_y) of the band in frame rows.
+    """
+    roi_height = height // num_rois
+    return min(active_rois) * roi_height, (max(active_rois) + 1) * roi_height
+
+
+def calculate_roi_midpoints(binary_mask, active_rois, num_rois=10, frame_height=None, row_offset=0):
+    """
+    Calculate midpoints for the active ROIs in one batched pass.
+
+    For every ROI the first row that contains foreground is used, and its left and
+    right foreground edges give the midpoint.
+
+    Args:
+        binary_mask (numpy.ndarray): Binary mask frame (white for segmented regions, black for background).
+        active_rois (list of int): ROI indices to evaluate.
+        num_rois (int): Number of horizontal ROI bands in the frame.
+        frame_height (int or None): Height the ROI bands are laid out on, defaults to the mask height.
+        row_offset (int): Frame row of the first mask row, for masks covering only a band of the frame.
+
+    Returns:
+        dict: Dictionary of midpoints for active ROIs with ROI index as the key.
+    """
+    if len(active_rois) == 0:
+        return {}
+
+    mask = as_single_channel(binary_mask)
+    rows, roi_height = roi_row_indices(frame_height or mask.shape[0], active_rois, num_rois)
+    if roi_height == 0:
+        return {roi_index: None for roi_index in active_rois}
+
+    left, right, valid = row_edges(mask, rows.ravel() - row_offset)
+    left = left.reshape(rows.shape)
+    right = right.reshape(rows.shape)
+    valid = valid.reshape(rows.shape)
+
+    # First row with foreground inside every ROI
+    first_row = valid.argmax(axis=1)
+    pick = (np.arange(len(active_rois)), first_row)
+    found = valid[pick]
+    mid_x = (left[pick] + right[pick]) // 2
+    mid_y = rows[:, 0] + roi_height // 2
+
+    return {
+        roi_index: (int(mid_x[i]), int(mid_y[i])) if found[i] else None
+        for i, roi_index in enumerate(active_rois)
+    }
+
+
+def scale_midpoints(midpoints, scale):
+    """
+    Map midpoints computed on a resized mask back to frame coordinates.
+
+    Args:
+        midpoints (dict): Dictionary of midpoints for active ROIs.
+        scale (tuple): (scale_x, scale_y) from mask to frame coordinates.
+
+    Returns:
+        dict: Dictionary of midpoints in frame coordinates.
+    """
+    scale_x, scale_y = scale
+    if scale_x == 1.0 and scale_y == 1.0:
+        return midpoints
+    return {
+        roi_index: (int(point[0] * scale_x), int(point[1] * scale_y)) if point is not None else None
+        for roi_index, point in midpoints.items()
+    }
@@ -0,0 +1,226 @@
+import argparse
+import importlib.util
+import os
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+# torch and ultralytics are imported on first use, so importing this module (stub models,
+# viewers without a model) works without them and thread settings can precede the import
+BACKENDS = ("torch", "onnx", "openvino")
+
+
+def exported_path(model_path, backend):
+    """
+    Return where ultralytics writes the export of `model_path` for `backend`.
+
+    Args:
+        model_path (str): Path to the .pt weights.
+        backend (str): "torch", "onnx" or "openvino".
+
+    Returns:
+        str: Path of the exported model (the weights themselves for "torch").
+    """
+    stem, _ = os.path.splitext(model_path)
+    if backend == "onnx":
+        return stem + ".onnx"
+    if backend == "openvino":
+        return stem + "_openvino_model"
+    return model_path
+
+
+def backend_available(model_path, backend):
+    """
+    Check whether the runtime for `backend` is installed and its exported model exists.
+    """
+    if backend == "torch":
+        return os.path.exists(model_path)
+    runtime = "onnxruntime" if backend == "onnx" else "openvino"
+    return importlib.util.find_spec(runtime) is not None and os.path.exists(exported_path(model_path, backend))
+
+
+def export_model(model_path, formats=("onnx", "openvino"), imgsz=640, half=False):
+    """
+    Convert .pt weights once into CPU inference formats next to the weights.
+
+    Args:
+        model_path (str): Path to the .pt weights.
+        formats (tuple of str): Export formats, "onnx" and/or "openvino".
+        imgsz (int): Static input size baked into the exported model.
+        half (bool): Export FP16 weights (OpenVINO only).
+
+    Returns:
+        dict: Exported model path per format.
+    """
+    from ultralytics import YOLO
+
+    model = YOLO(model_path)
+    paths = {}
+    for fmt in formats:
+        if fmt == "onnx":
+            paths[fmt] = model.export(format="onnx", imgsz=imgsz, simplify=True)
+        elif fmt == "openvino":
+            paths[fmt] = model.export(format="openvino", imgsz=imgsz, half=half)
+        else:
+            raise ValueError(f"Unsupported export format: {fmt}")
+    return paths
+
+
+class SegmentationBackend:
+    def __init__(self, model_path, backend="torch", imgsz=640, threads=None, warmup=3, device=None):
+        """
+        Segmentation model behind a common interface for PyTorch, ONNX Runtime and OpenVINO.
+
+        Calling the backend with a frame returns the same ultralytics Results list as
+        YOLO(model_path)(frame), so masks and boxes are read the same way whatever runs
+        underneath.
+
+        Args:
+            model_path (str): Path to the .pt weights (exported models are looked up next to it).
+            backend (str): "torch", "onnx" or "openvino".
+            imgsz (int): Inference input size, must match the export size for exported models.
+            threads (int or None): CPU threads used for inference, None keeps the runtime default.
+            warmup (int): Dummy inferences run on load so the first real frame is not slow.
+            device (str or None): Torch device, e.g. "cpu", "cuda:0" or "mps".
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend: {backend}")
+        self.backend = backend
+        self.imgsz = imgsz
+        self.threads = threads
+        self.device = device
+
+        if threads is not None:
+            # Only effective before torch is first imported; set_num_threads covers the other case
+            os.environ["OMP_NUM_THREADS"] = str(threads)
+        import torch
+        from ultralytics import YOLO
+
+        if threads is not None:
+            torch.set_num_threads(threads)
+
+        self.path = exported_path(model_path, backend)
+        self.model = YOLO(self.path, task="segment")
+        self.warmup(warmup)
+
+    def __call__(self, frame, **kwargs):
+        kwargs.setdefault("imgsz", self.imgsz)
+        kwargs.setdefault("verbose", False)
+        if self.device is not None:
+            kwargs.setdefault("device", self.device)
+        return self.model(frame, **kwargs)
+
+    predict = __call__
+
+    def warmup(self, iterations=3, shape=(480, 640, 3)):
+        """
+        Run dummy inferences so the runtime is loaded before the first real frame.
+
+        The runtime session is created lazily on the first call, so that call runs with
+        the configured thread count applied to ONNX Runtime / OpenVINO.
+
+        Returns:
+            float: Seconds per warmup inference after the first one, or None without warmup.
+        """
+        if iterations <= 0 and self.threads is None:
+            return None
+        frame = np.zeros(shape, dtype=np.uint8)
+        with self.runtime_threads():
+            self(frame)
+        if iterations <= 1:
+            return None
+
+        start = time.perf_counter()
+        for _ in range(iterations - 1):
+            self(frame)
+        return (time.perf_counter() - start) / (iterations - 1)
+
+    @contextmanager
+    def runtime_threads(self):
+        """
+        Apply the thread count to the ONNX Runtime / OpenVINO session created inside the block.
+
+        ultralytics creates these sessions without options, so the runtime entry points
+        are wrapped only while the session is being built.
+        """
+        if self.threads is None or self.backend == "torch":
+            yield
+            return
+
+        threads = self.threads
+        if self.backend == "onnx":
+            import onnxruntime as runtime
+
+            class ThreadedSession(runtime.InferenceSession):
+                def __init__(self, path, sess_options=None, *args, **kwargs):
+                    if sess_options is None:
+                        sess_options = runtime.SessionOptions()
+                        sess_options.intra_op_num_threads = threads
+                    super().__init__(path, sess_options, *args, **kwargs)
+
+            name, patched = "InferenceSession", ThreadedSession
+        else:
+            import openvino as runtime
+
+            class ThreadedCore(runtime.Core):
+                def compile_model(self, model, device_name=None, config=None, **kwargs):
+                    config = dict(config or {})
+                    config.setdefault("INFERENCE_NUM_THREADS", threads)
+                    return super().compile_model(model, device_name, config, **kwargs)
+
+            name, patched = "Core", ThreadedCore
+
+        original = getattr(runtime, name)
+        setattr(runtime, name, patched)
+        try:
+            yield
+        finally:
+            setattr(runtime, name, original)
+
+
+def load_backend(model_path, backend="auto", imgsz=640, threads=None, warmup=3, device=None):
+    """
+    Load the requested backend, or with "auto" the fastest one available on this host.
+
+    "auto" keeps PyTorch when a GPU (CUDA/MPS) is present, otherwise prefers OpenVINO,
+    then ONNX Runtime, then PyTorch on the CPU.
+
+    Args:
+        model_path (str): Path to the .pt weights.
+        backend (str): "auto", "torch", "onnx" or "openvino".
+        imgsz, threads, warmup, device: See SegmentationBackend.
+
+    Returns:
+        SegmentationBackend: The loaded backend.
+    """
+    if backend == "auto":
+        has_gpu = False
+        if importlib.util.find_spec("torch") is not None:
+            import torch
+            has_gpu = torch.cuda.is_available() or torch.backends.mps.is_available()
+        backend = "torch"
+        if not has_gpu:
+            for candidate in ("openvino", "onnx"):
+                if backend_available(model_path, candidate):
+                    backend = candidate
+                    break
+    print(f"Segmentation backend: {backend}")
+    return SegmentationBackend(model_path, backend, imgsz=imgsz, threads=threads, warmup=warmup, device=device)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export segmentation weights for CPU inference.")
+    parser.add_argument("model", help="Path to the .pt weights, e.g. python-code/yolo11s-seg-v1-train10.pt")
+    parser.add_argument("--formats", default="onnx,openvino", help="Comma separated export formats.")
+    parser.add_argument("--imgsz", type=int, default=640, help="Static input size of the exported model.")
+    parser.add_argument("--half", action="store_true", help="Export FP16 OpenVINO weights.")
+    args = parser.parse_args()
+
+    paths = export_model(args.model, tuple(args.formats.split(",")), imgsz=args.imgsz, half=args.half)
+    for fmt, path in paths.items():
+        print(f"Exported {fmt}: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,386 @@
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+
+import cv2
+import numpy as np
+
+TELEMETRY_TOPICS = ["TurnValue", "ThrottleValue", "SafetyValue", "ModeValue", "ForwardValue", "StatusValue"]
+
+FRAME_INDEX_DTYPE = np.dtype([("seq", "<i8"), ("MonotonicTime", "<f8"), ("WallTime", "<f8")])
+TELEMETRY_DTYPE = np.dtype([("MonotonicTime", "<f8"), ("WallTime", "<f8"), ("topic", "<i8"), ("value", "<i8")])
+
+
+def segmentation_dtype(num_active_rois):
+    """
+    One processed frame: its ROI midpoints (NaN where none was found) and the motor command.
+    """
+    return np.dtype([("seq", "<i8"), ("MonotonicTime", "<f8"),
+                     ("midpoints", "<f4", (num_active_rois, 2)), ("command", "<f4", (2,))])
+
+
+class SessionRecorder:
+    def __init__(self, path, active_rois, topics=TELEMETRY_TOPICS, record_masks=False, queue_size=64,
+                 record_queue_size=1024):
+        """
+        Record frames, segmentation outputs and MQTT telemetry of one run on a common clock.
+
+        A session is a directory of append-only files of fixed-size little-endian records,
+        all stamped with time.monotonic(), so every stream can be memory-mapped while or
+        after it is written:
+            - frames.bin / frames.idx: raw frames and (seq, MonotonicTime, WallTime) per frame.
+            - segmentation.bin: seq, capture time, ROI midpoints and motor command per processed frame.
+            - masks.bin: binary masks at frame size, when record_masks is set.
+            - telemetry.bin: one (MonotonicTime, WallTime, topic, value) record per MQTT message.
+            - session.json: shapes, dtypes, topics and ROIs needed to map the files.
+
+        Records are handed to a background writer thread and never block the caller: frames
+        and the small segmentation/telemetry records have their own queues, the writer drains
+        the small records first, and whatever does not fit when the disk falls behind is
+        dropped and counted instead of stalling the control loop or the MQTT network thread.
+
+        Args:
+            path (str): Session directory, created if missing; must not hold a session yet.
+            active_rois (list of int): ROI indices, fixing the midpoint layout.
+            topics (list of str): Telemetry topics in id order.
+            record_masks (bool): Also store the binary segmentation masks.
+            queue_size (int): Frames waiting for the writer before frames are dropped.
+            record_queue_size (int): Segmentation/telemetry records (with masks) waiting before they are dropped.
+        """
+        os.makedirs(path, exist_ok=True)
+        if os.path.exists(os.path.join(path, "session.json")):
+            raise FileExistsError(f"{path} already holds a recorded session")
+        self.path = path
+        self.active_rois = list(active_rois)
+        self.topics = list(topics)
+        self.topic_ids = {topic: i for i, topic in enumerate(self.topics)}
+        self.record_masks = record_masks
+        self.segmentation_dtype = segmentation_dtype(len(self.active_rois))
+        self.frame_shape = None
+        self.files = {}
+        self.dropped = 0
+        self.dropped_records = 0
+        self.lock = threading.Lock()
+
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.records = queue.Queue(maxsize=record_queue_size)
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def write_metadata(self):
+        metadata = {
+            "frame_shape": list(self.frame_shape),
+            "active_rois": self.active_rois,
+            "topics": self.topics,
+            "record_masks": self.record_masks,
+            "frame_index_dtype": FRAME_INDEX_DTYPE.descr,
+            "segmentation_dtype": self.segmentation_dtype.descr,
+            "telemetry_dtype": TELEMETRY_DTYPE.descr,
+            "start_wall_time": time.time(),
+            "start_monotonic_time": time.monotonic(),
+        }
+        with open(os.path.join(self.path, "session.json"), "w") as file:
+            json.dump(metadata, file, indent=2)
+
+    def enqueue(self, items, frame):
+        try:
+            (self.queue if frame else self.records).put_nowait(items)
+        except queue.Full:
+            with self.lock:
+                if frame:
+                    self.dropped += 1
+                else:
+                    self.dropped_records += 1
+
+    def record_frame(self, frame, capture_time, seq):
+        """
+        Append a frame. All frames of a session must have the shape of the first one.
+        """
+        if self.frame_shape is None:
+            self.frame_shape = frame.shape
+            self.write_metadata()
+        index = np.array([(seq, capture_time, time.time())], dtype=FRAME_INDEX_DTYPE)
+        # tobytes() copies, so the caller may reuse or overwrite the frame right away
+        self.enqueue([("frames.bin", frame.tobytes()), ("frames.idx", index.tobytes())], frame=True)
+
+    def record_segmentation(self, seq, capture_time, midpoints, command=None, mask=None):
+        """
+        Append the ROI midpoints and motor command computed for a frame.
+
+        Args:
+            seq (int): Sequence number of the frame.
+            capture_time (float): time.monotonic() capture time of the frame.
+            midpoints (dict): ROI -> (x, y) or None, as calculate_roi_midpoints.
+            command (tuple or None): (left_speed, right_speed).
+            mask (numpy.ndarray or None): Binary mask, stored when record_masks is set.
+        """
+        record = np.zeros(1, dtype=self.segmentation_dtype)
+        record["seq"] = seq
+        record["MonotonicTime"] = capture_time
+        record["midpoints"] = np.nan
+        record["command"] = np.nan
+        for i, roi in enumerate(self.active_rois):
+            point = (midpoints or {}).get(roi)
+            if point is not None:
+                record["midpoints"][0, i] = point
+        if command is not None:
+            record["command"] = command
+        items = [("segmentation.bin", record.tobytes())]
+
+        if self.record_masks and self.frame_shape is not None:
+            height, width = self.frame_shape[:2]
+            if mask is None:
+                mask = np.zeros((height, width), dtype=np.uint8)
+            elif mask.shape[:2] != (height, width):
+                mask = cv2.resize(mask, (width, height), interpolation=cv2.INTER_NEAREST)
+            items.append(("masks.bin", np.ascontiguousarray(mask, dtype=np.uint8).tobytes()))
+        self.enqueue(items, frame=False)
+
+    def record_telemetry(self, topic, value, capture_time=None):
+        """
+        Append one telemetry message, stamped on arrival unless capture_time is given.
+        """
+        topic_id = self.topic_ids.get(topic)
+        if topic_id is None:
+            return
+        mono = time.monotonic() if capture_time is None else capture_time
+        record = np.array([(mono, time.time(), topic_id, int(value))], dtype=TELEMETRY_DTYPE)
+        self.enqueue([("telemetry.bin", record.tobytes())], frame=False)
+
+    def on_message(self, client, userdata, msg):
+        """
+        paho-mqtt on_message callback recording the telemetry topics.
+        """
+        try:
+            self.record_telemetry(msg.topic, int(msg.payload.decode()))
+        except ValueError:
+            pass
+
+    def next_items(self):
+        """
+        Next queued records, the small ones first; None when both queues stayed empty.
+        """
+        try:
+            return self.records.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            return self.queue.get(timeout=0.01)
+        except queue.Empty:
+            return None
+
+    def run(self):
+        while self.running or not self.queue.empty() or not self.records.empty():
+            items = self.next_items()
+            if items is None:
+                continue
+            for name, data in items:
+                file = self.files.get(name)
+                if file is None:
+                    file = self.files[name] = open(os.path.join(self.path, name), "ab")
+                file.write(data)
+            if self.queue.empty() and self.records.empty():
+                for file in self.files.values():
+                    file.flush()
+
+    def stats(self):
+        with self.lock:
+            return {"queued": self.queue.qsize() + self.records.qsize(), "dropped_frames": self.dropped,
+                    "dropped_records": self.dropped_records}
+
+    def close(self):
+        """
+        Write everything still queued and close the files.
+        """
+        self.running = False
+        self.thread.join()
+        for file in self.files.values():
+            file.close()
+        self.files = {}
+
+
+class SessionReader:
+    def __init__(self, path):
+        """
+        Memory-mapped view of a recorded session; safe to open while it is still being written.
+
+        Args:
+            path (str): Session directory written by SessionRecorder.
+        """
+        self.path = path
+        with open(os.path.join(path, "session.json")) as file:
+            self.metadata = json.load(file)
+        self.frame_shape = tuple(self.metadata["frame_shape"])
+        self.active_rois = self.metadata["active_rois"]
+        self.topics = self.metadata["topics"]
+
+        index = self.map("frames.idx", FRAME_INDEX_DTYPE)
+        frame_size = int(np.prod(self.frame_shape))
+        frames_bytes = os.path.getsize(os.path.join(path, "frames.bin"))
+        count = min(len(index), frames_bytes // frame_size)
+        self.frame_index = index[:count]
+        self.frames = np.memmap(os.path.join(path, "frames.bin"), dtype=np.uint8, mode="r",
+                                shape=(count,) + self.frame_shape) if count else np.zeros((0,) + self.frame_shape, np.uint8)
+
+        self.segmentation = self.map("segmentation.bin", segmentation_dtype(len(self.active_rois)))
+        self.telemetry = self.map("telemetry.bin", TELEMETRY_DTYPE)
+        self.masks = None
+        if self.metadata.get("record_masks"):
+            height, width = self.frame_shape[:2]
+            masks = self.map("masks.bin", np.dtype((np.uint8, (height, width))))
+            self.masks = masks[:len(self.segmentation)]
+
+    def map(self, name, dtype):
+        file_path = os.path.join(self.path, name)
+        size = os.path.getsize(file_path) if os.path.exists(file_path) else 0
+        count = size // dtype.itemsize  # Ignore a record still being written
+        if count == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(file_path, dtype=dtype, mode="r", shape=(count,))
+
+    def __len__(self):
+        return len(self.frame_index)
+
+    def telemetry_at(self, topic, capture_time):
+        """
+        Latest value of a telemetry topic at a monotonic time, None before its first message.
+        """
+        topic_id = self.topics.index(topic)
+        records = self.telemetry[self.telemetry["topic"] == topic_id]
+        i = np.searchsorted(records["MonotonicTime"], capture_time, side="right") - 1
+        return int(records["value"][i]) if i >= 0 else None
+
+    def midpoints(self, i):
+        """
+        Recorded midpoints of segmentation record i as a dict, like calculate_roi_midpoints.
+        """
+        points = self.segmentation["midpoints"][i]
+        return {roi: None if np.isnan(x) else (int(x), int(y)) for roi, (x, y) in zip(self.active_rois, points)}
+
+
+class ReplaySource:
+    def __init__(self, path, speed=1.0, loop=False, telemetry=None):
+        """
+        Play a recorded session back as a capture source for ROICenterlineProcessor.
+
+        Frames come out with the recorded capture-time spacing divided by `speed`; speed
+        None (or 0) returns them as fast as they are read. clock() reports the recorded
+        monotonic capture time of the current frame, so the PID sees the original time steps
+        at any replay speed. With a telemetry store, the recorded MQTT messages up to each
+        frame are fed into it on the replay timeline, so lookups at the returned capture
+        times see what the robot reported when the frame was recorded.
+
+        Args:
+            path (str): Session directory.
+            speed (float or None): 1.0 for real time, N for N times faster, None for no pacing.
+            loop (bool): Start over at the end instead of ending the stream.
+            telemetry (TelemetryStore or None): Store to replay the recorded telemetry into.
+        """
+        self.session = SessionReader(path)
+        self.speed = speed or None
+        self.loop = loop
+        self.telemetry = telemetry
+        self.telemetry_position = 0
+        self.position = 0
+        self.start = None          # (recorded time, replay time) of the first frame played
+        self.opened = len(self.session) > 0
+        # Recorded capture time of the current frame, starting at the first one
+        self.current_capture_time = (float(self.session.frame_index["MonotonicTime"][0]) if self.opened
+                                     else time.monotonic())
+
+    def clock(self):
+        return self.current_capture_time
+
+    def replay_telemetry(self, recorded, now):
+        """
+        Feed the recorded messages up to recorded capture time `recorded` into the store,
+        stamped at the same distance before `now` as they were before the frame.
+        """
+        records = self.session.telemetry
+        scale = self.speed or 1.0
+        end = int(np.searchsorted(records["MonotonicTime"], recorded, side="right"))
+        for record in records[self.telemetry_position:end]:
+            topic = self.session.topics[int(record["topic"])]
+            self.telemetry.record(topic, int(record["value"]), now - (recorded - float(record["MonotonicTime"])) / scale)
+        self.telemetry_position = max(self.telemetry_position, end)
+
+    def read_latest(self, timeout=None):
+        """
+        Return the next recorded frame, paced by the replay speed.
+
+        Returns:
+            tuple: (ret, frame, capture_time, seq) with capture_time on this process's monotonic clock.
+        """
+        if self.position >= len(self.session):
+            if not self.loop or len(self.session) == 0:
+                self.opened = False
+                return False, None, None, self.position
+            self.position = 0
+            self.telemetry_position = 0
+            self.start = None
+
+        record = self.session.frame_index[self.position]
+        recorded = float(record["MonotonicTime"])
+        now = time.monotonic()
+        if self.start is None:
+            self.start = (recorded, now)
+        if self.speed is not None:
+            due = self.start[1] + (recorded - self.start[0]) / self.speed
+            if due > now:
+                time.sleep(due - now)
+            now = max(now, due)
+
+        if self.telemetry is not None:
+            self.replay_telemetry(recorded, now)
+        frame = np.array(self.session.frames[self.position])  # Copy out of the file mapping
+        self.current_capture_time = recorded
+        self.position += 1
+        return True, frame, now, int(record["seq"])
+
+    def read(self):
+        ret, frame, _, _ = self.read_latest()
+        return ret, frame
+
+    def isOpened(self):
+        return self.opened
+
+    def get(self, prop_id):
+        if prop_id == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.session.frame_shape[1])
+        if prop_id == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.session.frame_shape[0])
+        if prop_id == cv2.CAP_PROP_FRAME_COUNT:
+            return float(len(self.session))
+        if prop_id == cv2.CAP_PROP_POS_FRAMES:
+            return float(self.position)
+        return 0.0
+
+    def release(self):
+        self.opened = False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize a recorded session.")
+    parser.add_argument("path", help="Session directory.")
+    args = parser.parse_args()
+
+    session = SessionReader(args.path)
+    times = session.frame_index["MonotonicTime"]
+    duration = float(times[-1] - times[0]) if len(times) > 1 else 0.0
+    summary = {
+        "frames": len(session),
+        "duration_s": round(duration, 3),
+        "fps": round((len(session) - 1) / duration, 2) if duration > 0 else None,
+        "segmentation_records": len(session.segmentation),
+        "telemetry_messages": {topic: int(np.count_nonzero(session.telemetry["topic"] == i))
+                               for i, topic in enumerate(session.topics)},
+    }
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from telemetry_recorder import record_dtype
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+SWITCH_ON = 1800  # Channel value above which a switch counts as ON (as in mqtt-api.ino)
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "telemetry_reader")
+
+
+def parse_time(value):
+    """
+    Convert a "YYYY-mm-dd HH:MM:SS" local time string or epoch seconds to epoch seconds.
+    """
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return time.mktime(time.strptime(value, TIMESTAMP_FORMAT))
+
+
+def count_rows(path, block_size=1 << 24):
+    """
+    Count data rows of a CSV file without parsing it.
+
+    This is an upper bound: blank lines are counted too, while pandas skips them.
+    """
+    lines = 0
+    last = b"\n"
+    with open(path, "rb") as file:
+        while True:
+            block = file.read(block_size)
+            if not block:
+                break
+            lines += block.count(b"\n")
+            last = block[-1:]
+    if last != b"\n":
+        lines += 1
+    return max(lines - 1, 0)
+
+
+def csv_to_npy(csv_path, npy_path, chunk_rows=1_000_000):
+    """
+    Convert a telemetry CSV into a memory-mappable .npy file of typed records, chunk by chunk.
+
+    Handles the old motor_data.csv layout (Timestamp + topics) and the TelemetryRecorder
+    layout (with WallTime/MonotonicTime columns).
+    """
+    header = pd.read_csv(csv_path, nrows=0).columns.tolist()
+    topics = [name for name in header if name not in ("Timestamp", "WallTime", "MonotonicTime")]
+    dtype = record_dtype(topics)
+    records = np.lib.format.open_memmap(npy_path + ".tmp", mode="w+", dtype=dtype, shape=(count_rows(csv_path),))
+
+    offset = 0
+    for chunk in pd.read_csv(csv_path, chunksize=chunk_rows):
+        end = offset + len(chunk)
+        if "WallTime" in chunk:
+            records["WallTime"][offset:end] = chunk["WallTime"].to_numpy(dtype=np.float64)
+            records["MonotonicTime"][offset:end] = chunk["MonotonicTime"].to_numpy(dtype=np.float64)
+        else:
+            # One-second timestamps: parse every distinct string once
+            stamps, inverse = np.unique(chunk["Timestamp"].to_numpy(dtype=str), return_inverse=True)
+            seconds = np.array([parse_time(stamp) for stamp in stamps], dtype=np.float64)
+            records["WallTime"][offset:end] = seconds[inverse]
+            records["MonotonicTime"][offset:end] = np.nan
+        for topic in topics:
+            records[topic][offset:end] = chunk[topic].to_numpy(dtype=np.int64)
+        offset = end
+
+    records.flush()
+    if offset < len(records):
+        # Blank lines made the preallocation too long; keep only the rows pandas filled
+        trimmed = np.lib.format.open_memmap(npy_path + ".trim", mode="w+", dtype=dtype, shape=(offset,))
+        for start in range(0, offset, chunk_rows):
+            trimmed[start:start + chunk_rows] = records[start:min(start + chunk_rows, offset)]
+        trimmed.flush()
+        del trimmed, records
+        os.replace(npy_path + ".trim", npy_path)
+        os.remove(npy_path + ".tmp")
+        return
+    del records
+    os.replace(npy_path + ".tmp", npy_path)
+
+
+def cache_path(csv_path, cache_dir):
+    """
+    .npy cache file of a CSV log; the hash of its absolute path keeps same-named logs apart.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    digest = hashlib.sha1(os.path.abspath(csv_path).encode()).hexdigest()[:8]
+    return os.path.join(cache_dir, f"{os.path.basename(csv_path)}-{digest}.npy")
+
+
+class TelemetryLog:
+    def __init__(self, path, chunk_rows=1_000_000, cache_dir=DEFAULT_CACHE_DIR):
+        """
+        Memory-mapped telemetry log with a timestamp index.
+
+        CSV logs are converted once into a typed .npy cache in `cache_dir` (rebuilt when
+        the CSV is newer), outside the data directories; binary TelemetryRecorder logs are
+        mapped directly. Columns are NumPy views, so nothing is loaded into Python objects.
+
+        Args:
+            path (str): .csv log, or .bin log with its .json sidecar.
+            chunk_rows (int): Rows processed at a time by the streaming statistics.
+            cache_dir (str): Directory for the .npy caches of CSV logs, created if missing.
+        """
+        self.path = path
+        self.chunk_rows = chunk_rows
+
+        if path.endswith(".bin"):
+            with open(os.path.splitext(path)[0] + ".json") as sidecar:
+                descr = json.load(sidecar)["dtype"]
+            dtype = np.dtype([tuple(field) for field in descr])
+            self.records = np.memmap(path, dtype=dtype, mode="r")
+        else:
+            cache = cache_path(path, cache_dir)
+            if not os.path.exists(cache) or os.path.getmtime(cache) < os.path.getmtime(path):
+                csv_to_npy(path, cache, chunk_rows)
+            self.records = np.load(cache, mmap_mode="r")
+
+        self.topics = [name for name in self.records.dtype.names if name not in ("WallTime", "MonotonicTime")]
+        self.time = self.records["WallTime"]
+        self.order = None if self.is_sorted(self.time) else np.argsort(self.time, kind="stable")
+
+    def __len__(self):
+        return len(self.records)
+
+    def is_sorted(self, values):
+        for start in range(0, len(values), self.chunk_rows):
+            # Overlap by one row so chunk boundaries are checked too
+            chunk = values[max(start - 1, 0):start + self.chunk_rows]
+            if np.any(np.diff(chunk) < 0):
+                return False
+        return True
+
+    def time_range(self, start=None, end=None):
+        """
+        Return row indices with start <= WallTime < end via binary search on the timestamp index.
+
+        Args:
+            start, end (str, float or None): "YYYY-mm-dd HH:MM:SS" local time or epoch seconds.
+
+        Returns:
+            slice or numpy.ndarray: Rows in the window (a slice when the log is time-ordered).
+        """
+        start, end = parse_time(start), parse_time(end)
+        times = self.time if self.order is None else self.time[self.order]
+        lo = 0 if start is None else int(np.searchsorted(times, start, side="left"))
+        hi = len(times) if end is None else int(np.searchsorted(times, end, side="left"))
+        if self.order is None:
+            return slice(lo, hi)
+        return np.sort(self.order[lo:hi])
+
+    def window(self, start=None, end=None):
+        """
+        Return the records in a time window (a memory-mapped view when possible).
+        """
+        return self.records[self.time_range(start, end)]
+
+    def chunks(self, rows=None):
+        """
+        Yield consecutive record chunks of the whole log or of a row selection.
+        """
+        records = self.records if rows is None else self.records[rows]
+        for start in range(0, len(records), self.chunk_rows):
+            yield records[start:start + self.chunk_rows]
+
+    def where(self, rows=None, **ranges):
+        """
+        Vectorized filter on column ranges, streamed chunk by chunk.
+
+        Example: where(StatusValue=(1501, None), ThrottleValue=(1000, None))
+
+        Args:
+            rows (slice or None): Restrict the filter to these rows, e.g. from time_range().
+            **ranges: column=(min, max) with inclusive bounds, None for open ends.
+
+        Returns:
+            numpy.ndarray: Matching records (copied, only the matches are held in memory).
+        """
+        parts = []
+        for chunk in self.chunks(rows):
+            keep = np.ones(len(chunk), dtype=bool)
+            for column, (low, high) in ranges.items():
+                if low is not None:
+                    keep &= chunk[column] >= low
+                if high is not None:
+                    keep &= chunk[column] <= high
+            parts.append(chunk[keep])
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=self.records.dtype)
+
+    def histogram(self, column, bins=np.arange(900, 2101, 10), rows=None):
+        """
+        Histogram of a channel column, accumulated chunk by chunk.
+
+        Returns:
+            tuple: (counts, bin_edges)
+        """
+        counts = np.zeros(len(bins) - 1, dtype=np.int64)
+        for chunk in self.chunks(rows):
+            counts += np.histogram(chunk[column], bins=bins)[0]
+        return counts, bins
+
+    def segments(self, column="ModeValue", threshold=SWITCH_ON, rows=None):
+        """
+        Find contiguous runs where `column` >= threshold (e.g. autonomous mode ON).
+
+        Returns:
+            numpy.ndarray: (n, 2) array of [start_row, end_row) pairs.
+        """
+        values = self.records[column] if rows is None else self.records[rows][column]
+        bounds = []
+        previous = False
+        for start in range(0, len(values), self.chunk_rows):
+            on = values[start:start + self.chunk_rows] >= threshold
+            edges = np.diff(np.concatenate(([previous], on)).astype(np.int8))
+            bounds.append(np.flatnonzero(edges) + start)
+            previous = bool(on[-1])
+        bounds = np.concatenate(bounds) if bounds else np.zeros(0, dtype=np.int64)
+        if previous:
+            bounds = np.append(bounds, len(values))
+        return bounds.reshape(-1, 2)
+
+    def summary(self, rows=None):
+        """
+        Per-column count, min, max and mean, streamed chunk by chunk.
+
+        Returns:
+            dict: Summary statistics per topic plus the time span.
+        """
+        stats = {topic: {"min": None, "max": None, "sum": 0} for topic in self.topics}
+        count = 0
+        for chunk in self.chunks(rows):
+            if len(chunk) == 0:
+                continue
+            count += len(chunk)
+            for topic in self.topics:
+                column = chunk[topic]
+                entry = stats[topic]
+                low, high = int(column.min()), int(column.max())
+                entry["min"] = low if entry["min"] is None else min(entry["min"], low)
+                entry["max"] = high if entry["max"] is None else max(entry["max"], high)
+                entry["sum"] += int(column.sum())
+
+        times = self.time if rows is None else self.time[rows]
+        summary = {"rows": count,
+                   "start": time.strftime(TIMESTAMP_FORMAT, time.localtime(times.min())) if count else None,
+                   "end": time.strftime(TIMESTAMP_FORMAT, time.localtime(times.max())) if count else None}
+        for topic, entry in stats.items():
+            summary[topic] = {"min": entry["min"], "max": entry["max"],
+                              "mean": entry["sum"] / count if count else None}
+        return summary
+
+
+def write_csv(records, columns, output):
+    """
+    Write selected columns of records as CSV, chunk by chunk.
+    """
+    output.write(",".join(columns) + "\n")
+    for start in range(0, len(records), 100_000):
+        chunk = records[start:start + 100_000]
+        np.savetxt(output, np.column_stack([chunk[column] for column in columns]), fmt="%d", delimiter=",")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query telemetry logs written by mqtt-read-data.py.")
+    parser.add_argument("path", help="Telemetry log (.csv or .bin).")
+    parser.add_argument("--start", default=None, help="Window start, 'YYYY-mm-dd HH:MM:SS' or epoch seconds.")
+    parser.add_argument("--end", default=None, help="Window end (exclusive).")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Directory for the .npy caches of CSV logs.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("summary", help="Row count, time span and per-channel min/max/mean.")
+    histogram = subparsers.add_parser("histogram", help="Channel histogram.")
+    histogram.add_argument("--column", default="TurnValue")
+    histogram.add_argument("--bin-width", type=int, default=10)
+    segments = subparsers.add_parser("segments", help="Runs where a switch channel is ON.")
+    segments.add_argument("--column", default="ModeValue")
+    segments.add_argument("--threshold", type=int, default=SWITCH_ON)
+    export = subparsers.add_parser("turn-throttle",
+                                   help="Export TurnValue/ThrottleValue with StatusValue > 1500 and ThrottleValue >= 1000.")
+    export.add_argument("--output", default="filtered_turn_throttle_data.csv")
+    args = parser.parse_args()
+
+    log = TelemetryLog(args.path, cache_dir=args.cache_dir)
+    rows = log.time_range(args.start, args.end)
+
+    if args.command == "summary":
+        print(json.dumps(log.summary(rows), indent=2))
+    elif args.command == "histogram":
+        counts, bins = log.histogram(args.column, np.arange(900, 2101, args.bin_width), rows)
+        for low, count in zip(bins[:-1], counts):
+            if count:
+                print(f"{low}\t{count}")
+    elif args.command == "segments":
+        times = log.time[rows]
+        for start, end in log.segments(args.column, args.threshold, rows):
+            print(f"{time.strftime(TIMESTAMP_FORMAT, time.localtime(times[start]))}\t"
+                  f"{time.strftime(TIMESTAMP_FORMAT, time.localtime(times[end - 1]))}\t{end - start} rows")
+    elif args.command == "turn-throttle":
+        selected = log.where(rows, StatusValue=(1501, None), ThrottleValue=(1000, None))
+        if args.output == "-":
+            write_csv(selected, ["TurnValue", "ThrottleValue"], sys.stdout)
+        else:
+            with open(args.output, "w") as output:
+                write_csv(selected, ["TurnValue", "ThrottleValue"], output)
+            print(f"Wrote {len(selected)} rows to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+
+def record_dtype(topics):
+    """
+    Structured dtype of one wide telemetry row: timestamps plus the latest value of every topic.
+    """
+    return np.dtype([("WallTime", "<f8"), ("MonotonicTime", "<f8")] + [(topic, "<i8") for topic in topics])
+
+
+class TelemetryRecorder:
+    def __init__(self, path, topics, fmt="csv", capacity=65536, flush_interval=1.0,
+                 rotate_bytes=64 * 1024 * 1024, rotate_seconds=3600):
+        """
+        Buffered telemetry logger that never blocks the MQTT network loop on disk I/O.
+
+        record() stamps each message with time.monotonic() and time.time() at receipt and
+        appends it to a preallocated NumPy ring buffer. A background thread turns new
+        messages into wide rows (latest value of every topic, as in motor_data.csv) and
+        writes them in batches, rotating files by size and age.
+
+        Output formats:
+            - "csv": Timestamp, <topics>, WallTime, MonotonicTime columns.
+            - "bin": Raw little-endian records of record_dtype(topics), appendable and
+                     readable with np.memmap, with the dtype in a .json sidecar.
+
+        Args:
+            path (str): Base file name, e.g. "motor_data.csv"; rotated files get a time suffix.
+            topics (list of str): Topics in column order.
+            fmt (str): "csv" or "bin".
+            capacity (int): Ring buffer size in messages.
+            flush_interval (float): Seconds between background flushes.
+            rotate_bytes (int): Start a new file after this many bytes.
+            rotate_seconds (float): Start a new file after this many seconds.
+        """
+        if fmt not in ("csv", "bin"):
+            raise ValueError(f"Unsupported telemetry format: {fmt}")
+        self.path = path
+        self.topics = list(topics)
+        self.topic_ids = {topic: i for i, topic in enumerate(self.topics)}
+        self.fmt = fmt
+        self.flush_interval = flush_interval
+        self.rotate_bytes = rotate_bytes
+        self.rotate_seconds = rotate_seconds
+        self.dtype = record_dtype(self.topics)
+
+        # Ring buffer of raw messages
+        self.capacity = capacity
+        self.mono = np.zeros(capacity, dtype=np.float64)
+        self.wall = np.zeros(capacity, dtype=np.float64)
+        self.topic = np.zeros(capacity, dtype=np.int16)
+        self.value = np.zeros(capacity, dtype=np.int64)
+        self.written = 0          # Messages recorded so far
+        self.flushed = 0          # Messages written to disk so far
+        self.dropped = 0          # Messages overwritten before they were flushed
+        self.lock = threading.Lock()
+
+        self.state = np.zeros(len(self.topics), dtype=np.int64)  # Latest value per topic
+        self.file = None
+        self.file_path = None
+        self.file_opened = 0.0
+        self.files = []
+
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def record(self, topic, value):
+        """
+        Append one message. Called from the MQTT callback, does no I/O.
+        """
+        topic_id = self.topic_ids.get(topic)
+        if topic_id is None:
+            return
+        mono, wall = time.monotonic(), time.time()
+        with self.lock:
+            i = self.written % self.capacity
+            self.mono[i] = mono
+            self.wall[i] = wall
+            self.topic[i] = topic_id
+            self.value[i] = value
+            self.written += 1
+
+    def take_pending(self):
+        """
+        Copy the messages not flushed yet out of the ring buffer.
+        """
+        with self.lock:
+            start = max(self.flushed, self.written - self.capacity)
+            self.dropped += start - self.flushed
+            end = self.written
+            self.flushed = end
+            index = np.arange(start, end) % self.capacity
+            return self.mono[index], self.wall[index], self.topic[index], self.value[index]
+
+    def to_rows(self, mono, wall, topic, value):
+        """
+        Expand messages into wide rows holding the latest value of every topic after each message.
+        """
+        rows = np.zeros(len(mono), dtype=self.dtype)
+        rows["WallTime"] = wall
+        rows["MonotonicTime"] = mono
+        positions = np.arange(len(mono))
+        for topic_id, name in enumerate(self.topics):
+            # Forward-fill: index of the last message of this topic at or before each row
+            last = np.maximum.accumulate(np.where(topic == topic_id, positions, -1))
+            column = np.where(last >= 0, value[np.maximum(last, 0)], self.state[topic_id])
+            rows[name] = column
+            if len(column):
+                self.state[topic_id] = column[-1]
+        return rows
+
+    def open_file(self):
+        """
+        Open a new output file named after the base path and the current time.
+        """
+        if self.file is not None:
+            self.file.close()
+        stem, ext = os.path.splitext(self.path)
+        ext = ".bin" if self.fmt == "bin" else (ext or ".csv")
+        self.file_path = f"{stem}-{time.strftime('%Y%m%d-%H%M%S')}{ext}"
+        if self.file_path in self.files:
+            self.file_path = f"{stem}-{time.strftime('%Y%m%d-%H%M%S')}-{len(self.files)}{ext}"
+        self.files.append(self.file_path)
+        self.file_opened = time.monotonic()
+
+        if self.fmt == "csv":
+            self.file = open(self.file_path, mode="w", newline="")
+            self.file.write(",".join(["Timestamp"] + self.topics + ["WallTime", "MonotonicTime"]) + "\n")
+        else:
+            self.file = open(self.file_path, mode="wb")
+            with open(os.path.splitext(self.file_path)[0] + ".json", "w") as sidecar:
+                json.dump({"dtype": self.dtype.descr, "topics": self.topics}, sidecar)
+
+    def write_rows(self, rows):
+        if self.file is None or self.file.tell() >= self.rotate_bytes \
+                or time.monotonic() - self.file_opened >= self.rotate_seconds:
+            self.open_file()
+
+        if self.fmt == "bin":
+            self.file.write(rows.tobytes())
+        else:
+            stamps = [time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(t)) for t in rows["WallTime"]]
+            values = np.column_stack([rows[name] for name in self.topics]).astype(str)
+            lines = [f"{stamp},{','.join(vals)},{wall:.6f},{mono:.6f}"
+                     for stamp, vals, wall, mono in zip(stamps, values, rows["WallTime"], rows["MonotonicTime"])]
+            self.file.write("\n".join(lines) + "\n")
+        self.file.flush()
+
+    def flush(self):
+        """
+        Write all pending messages to disk.
+        """
+        mono, wall, topic, value = self.take_pending()
+        if len(mono):
+            self.write_rows(self.to_rows(mono, wall, topic, value))
+
+    def run(self):
+        while self.running:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error writing telemetry: {e}")
+
+    def stats(self):
+        with self.lock:
+            return {"recorded": self.written, "flushed": self.flushed, "dropped": self.dropped,
+                    "file": self.file_path}
+
+    def close(self):
+        """
+        Stop the background thread, flush what is left and close the file.
+        """
+        self.running = False
+        self.thread.join(timeout=self.flush_interval + 1.0)
+        self.flush()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
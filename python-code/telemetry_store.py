@@ -0,0 +1,182 @@
+import time
+
+import numpy as np
+
+from session_recorder import TELEMETRY_TOPICS
+
+
+class TopicRing:
+    def __init__(self, capacity=4096):
+        """
+        Fixed-size history of one topic: (time.monotonic(), value) in arrival order.
+
+        One thread writes, any number read, without a lock, guarded like a seqlock: the
+        writer makes `sequence` odd before it touches a slot and even again once the slot and
+        `count` are updated. A reader takes an even `sequence`, does its search and copies,
+        and retries if `sequence` has changed meanwhile, so it never returns a slot that was
+        being overwritten or a search over a ring that was not sorted while it ran.
+
+        Args:
+            capacity (int): Messages kept; older ones are overwritten.
+        """
+        self.capacity = capacity
+        self.times = np.zeros(capacity, dtype=np.float64)
+        self.values = np.zeros(capacity, dtype=np.int64)
+        self.count = 0            # Messages written so far
+        self.sequence = 0         # Odd while the writer is updating the ring
+
+    def append(self, value, timestamp):
+        """
+        Append a message; only ever called from the single writer thread.
+        """
+        i = self.count % self.capacity
+        if self.count:
+            # Keep the times sorted even if a caller passes a slightly older timestamp
+            timestamp = max(timestamp, self.times[(self.count - 1) % self.capacity])
+        self.sequence += 1
+        self.times[i] = timestamp
+        self.values[i] = value
+        self.count += 1
+        self.sequence += 1
+
+    def read(self, reader):
+        """
+        Run reader(count) until it completes without a write in between and return its result.
+        """
+        while True:
+            begin = self.sequence
+            if begin & 1:
+                time.sleep(0)  # Let the writer finish its slot
+                continue
+            result = reader(self.count)
+            if self.sequence == begin:
+                return result
+
+    def search(self, timestamp, count):
+        """
+        Logical index of the last message at or before `timestamp` among the first `count`, or -1.
+
+        The ring is two sorted runs, [oldest slot:] and [:oldest slot], so one np.searchsorted
+        on the right run keeps the lookup O(log n). Only valid inside read().
+        """
+        if count <= self.capacity:
+            return int(np.searchsorted(self.times[:count], timestamp, side="right")) - 1
+        head = count % self.capacity       # Slot of the oldest message
+        first = count - self.capacity      # Its logical index
+        if head and timestamp >= self.times[0]:
+            return first + self.capacity - head + int(np.searchsorted(self.times[:head], timestamp, side="right")) - 1
+        i = int(np.searchsorted(self.times[head:], timestamp, side="right")) - 1
+        return first + i if i >= 0 else -1
+
+    def value_at(self, timestamp):
+        """
+        Value and time of the last message at or before `timestamp`.
+
+        Returns:
+            tuple or None: (value, message_time), None before the first kept message.
+        """
+        def reader(count):
+            index = self.search(timestamp, count)
+            if index < 0:
+                return None
+            slot = index % self.capacity
+            return int(self.values[slot]), float(self.times[slot])
+        return self.read(reader)
+
+    def latest(self):
+        """
+        Newest (value, message_time), None before the first message.
+        """
+        def reader(count):
+            if count == 0:
+                return None
+            slot = (count - 1) % self.capacity
+            return int(self.values[slot]), float(self.times[slot])
+        return self.read(reader)
+
+    def window(self, start, end):
+        """
+        Copy of the messages with start <= time <= end.
+
+        Returns:
+            tuple: (times, values) arrays in time order.
+        """
+        def reader(count):
+            first = self.search(np.nextafter(start, -np.inf), count) + 1
+            first = max(first, count - self.capacity, 0)
+            last = self.search(end, count)
+            index = np.arange(first, last + 1) % self.capacity
+            return self.times[index], self.values[index]
+        return self.read(reader)
+
+
+class TelemetryStore:
+    def __init__(self, topics=TELEMETRY_TOPICS, capacity=4096):
+        """
+        In-process time series of MQTT telemetry for frame-accurate lookups.
+
+        Every topic has its own TopicRing stamped with time.monotonic() on arrival, the
+        clock frame capture times use, so value_at(topic, capture_time) tells what the robot
+        reported when a frame was taken. Messages are written from one thread (the paho
+        network loop) and read from any number of others without a lock.
+
+        Args:
+            topics (list of str): Topics to keep; others are ignored.
+            capacity (int): Messages kept per topic.
+        """
+        self.topics = list(topics)
+        self.rings = {topic: TopicRing(capacity) for topic in self.topics}
+        self.ignored = 0
+
+    def record(self, topic, value, timestamp=None):
+        """
+        Store one message, stamped on arrival unless a time.monotonic() timestamp is given.
+        """
+        ring = self.rings.get(topic)
+        if ring is None:
+            self.ignored += 1
+            return
+        ring.append(value, time.monotonic() if timestamp is None else timestamp)
+
+    def on_message(self, client, userdata, msg):
+        """
+        paho-mqtt on_message callback storing the telemetry topics.
+        """
+        try:
+            self.record(msg.topic, int(msg.payload.decode()))
+        except ValueError:
+            pass
+
+    def value_at(self, topic, timestamp, default=None):
+        """
+        Value of a topic at a time.monotonic() timestamp, `default` before its first message.
+        """
+        entry = self.rings[topic].value_at(timestamp)
+        return entry[0] if entry is not None else default
+
+    def latest(self, topic, default=None):
+        entry = self.rings[topic].latest()
+        return entry[0] if entry is not None else default
+
+    def age(self, topic, now=None):
+        """
+        Seconds since the last message of a topic, None before the first one.
+        """
+        entry = self.rings[topic].latest()
+        if entry is None:
+            return None
+        return (time.monotonic() if now is None else now) - entry[1]
+
+    def snapshot(self, timestamp=None):
+        """
+        Value of every topic at a timestamp (now if None), None for topics not received yet.
+        """
+        if timestamp is None:
+            return {topic: self.latest(topic) for topic in self.topics}
+        return {topic: self.value_at(topic, timestamp) for topic in self.topics}
+
+    def window(self, topic, start, end):
+        return self.rings[topic].window(start, end)
+
+    def stats(self):
+        return {"messages": {topic: ring.count for topic, ring in self.rings.items()}, "ignored": self.ignored}